@@ -20,9 +20,12 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sb
-import calendar
 
-get_ipython().run_line_magic('matplotlib', 'inline')
+try:
+    get_ipython().run_line_magic('matplotlib', 'inline')
+except NameError:
+    # run as a plain python script: draw off screen
+    plt.switch_backend('Agg')
 
 
 # In[2]:
@@ -108,84 +111,43 @@ gobike.user_type.unique()
 
 # ## Cleaning Data
 
-# ### Create a copy of this dataset
+# > All the cleaning steps below live in the `gobike` package (`gobike/cleaning.py`) so that Part1 and Part2 share the same code. `clean_trips` fixes every issue listed in the Observations by building the cleaned columns straight from the raw dataset, only for the rows without missing data. `cached_trips` keeps its result in `.gobike_cache/`, keyed by the content of the csv file and the pipeline version, so the cleaning only runs again when one of them changes.
 
 # In[11]:
 
 
-clean_gobike = gobike.copy()
+from gobike import TripSummary, cached_trips
+
+clean_gobike = cached_trips('201902-fordgobike-tripdata.csv')
+# count, mean, variance, extremes, quartile sketches and level counts per station and day,
+# the describe() views below are merged from it (the quartiles are within 1%)
+summary = TripSummary.from_trips(clean_gobike)
 
 
 # ### Tidiness Issues
 # #### 1. Age column is absent
 
 # ##### Define
-# Create a new 'age' column from the existing 'member_birth_year' using the .apply(lambda) function, so that it is easy to call the age of rider instead of the year of birth. Ps: This data was collected since 2019, therefore our new age column will contain the age of riders in 2019
-
-# ##### Code
-
-# In[12]:
-
-
-# create a new age column for riders
-clean_gobike['age'] = clean_gobike['member_birth_year'].apply(lambda x: 2019 - x)
-
+# Create a new 'age' column from the existing 'member_birth_year', so that it is easy to call the age of rider instead of the year of birth. Ps: The age is computed in the year of each trip, so our new age column will contain the age of riders in 2019 for this data, and in the year of the trip for the later monthly files
 
 # ##### Test
 
 # In[13]:
 
 
-clean_gobike['age'].describe()
+summary.describe('age')
 
 
 # #### 2. Month column is absent
 
 # ##### Define
-# Create a month column from the start_time column using the apply(lambda) function. First we are going to convert the data type of start_time amd end_time to 'datetime'
-
-# ##### Code
-
-# In[14]:
-
-
-# convert start_time and end_time variable to datetime
-# extract month of the year
-clean_gobike[['start_time', 'end_time']] = clean_gobike[['start_time', 'end_time']].apply(pd.to_datetime)
-clean_gobike['start_month'] = clean_gobike['start_time'].apply(lambda time: time.month)
-clean_gobike['start_month'] = clean_gobike['start_month'].apply(lambda x: calendar.month_abbr[x])
-# The start_month column extracted from start_time has just one unique value (Feb)
-
-
-# In[15]:
-
-
-clean_gobike.start_month.unique()
-
-
-# ##### Test
-
-# In[16]:
-
-
-print(clean_gobike['start_month'].value_counts())
-
+# Create a month column from the start_time column. First we are going to convert the data type of start_time amd end_time to 'datetime'. The start_month column extracted from start_time has just one unique value (Feb), so it is dropped again with the other unwanted columns.
 
 # #### 3. Day column is absent
 
 # ##### Define
 # Create day columns from the start_time and end_time columns using the pandas.Series.dt.day_name function
 
-# ##### Code
-
-# In[17]:
-
-
-# create start_day and end_day column
-clean_gobike.insert(2, 'start_day', clean_gobike['start_time'].dt.day_name(), True)
-clean_gobike.insert(4, 'end_day', clean_gobike['end_time'].dt.day_name(), True)
-
-
 # ##### Test
 
 # In[18]:
@@ -198,43 +160,20 @@ print(clean_gobike['end_day'].head(5))
 # #### 4. Time of the day absent
 
 # ##### Define
-# Create time of the day column from the start_time column using the apply(lambda) function. 
-
-# ##### Code
-
-# In[19]:
-
-
-# create time of the day column
-clean_gobike['period'] = clean_gobike['start_time'].apply(lambda time: time.hour)
-clean_gobike['day_period'] = 'morning'
-clean_gobike['day_period'][(clean_gobike['period'] >= 12) & (clean_gobike['period'] <= 17)] = 'afternoon'
-clean_gobike['day_period'][(clean_gobike['period'] >= 18) & (clean_gobike['period'] <= 23)] = 'night'
-
+# Create time of the day column from the hour of the start_time column. 
 
 # ##### Test
 
 # In[20]:
 
 
-print(clean_gobike['period'].head(5))
 print(clean_gobike['day_period'].head(5))
 
 
 # #### 5. The column 'duration_sec' is not conveyed in a clear manner
 
 # ##### Define
-# Convey the duration_sec column in a more clear manner by creating two extra columns (duration_mins and duration_hour)
-
-# ##### Code
-
-# In[21]:
-
-
-# Create additional duration columns and round the values to 2 decimal points
-clean_gobike.insert(1, 'duration_mins', clean_gobike['duration_sec']/60, True)
-clean_gobike['duration_mins'] = round(clean_gobike['duration_mins'], 2)
-
+# Convey the duration_sec column in a more clear manner by creating an extra column (duration_mins)
 
 # ##### Test
 
@@ -249,15 +188,6 @@ print(clean_gobike['duration_mins'].head(5))
 # ##### Define
 # Drop columns that will not be needed in this analysis
 
-# ##### Code
-
-# In[23]:
-
-
-# drop unwanted columns
-clean_gobike.drop(['duration_sec', 'start_station_latitude', 'start_station_longitude', 'end_station_latitude', 'end_station_longitude', 'bike_share_for_all_trip', 'member_birth_year', 'start_month', 'period'], axis = 1, inplace = True)
-
-
 # ##### Test
 
 # In[24]:
@@ -273,15 +203,6 @@ clean_gobike.info()
 # ##### Define
 # Drop missing values on our dataset
 
-# ##### Code
-
-# In[25]:
-
-
-# drop rows with missing data
-clean_gobike.dropna(inplace = True)
-
-
 # ##### Test
 
 # In[26]:
@@ -296,22 +217,6 @@ clean_gobike.shape
 # ##### Define
 # Convert datatypes into a more useful type for our analysis eg: bike_id, age, start_station_id, end_station_id, start_day, end_day, day_period should be converted into a more appropriate and useful type.
 
-# ##### Code
-
-# In[27]:
-
-
-# convert data type
-clean_gobike[['bike_id', 'start_station_id', 'end_station_id']] = clean_gobike[['bike_id', 'start_station_id', 'end_station_id']].astype(str)
-clean_gobike['age'] = clean_gobike['age'].astype(int)
-variables = {'start_day': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], 
-             'end_day': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], 
-             'day_period': ['morning', 'afternoon', 'night']}
-for var in variables:
-    order_var = pd.api.types.CategoricalDtype(ordered = True, categories = variables[var])
-    clean_gobike[var] = clean_gobike[var].astype(order_var)
-
-
 # ##### Test
 
 # In[28]:
@@ -323,16 +228,7 @@ clean_gobike.dtypes
 # #### 3. Improper representation of values
 
 # ##### Define
-# Slice the '.0' attached to the start_station_id and end_station_id values
-
-# ##### Code
-
-# In[29]:
-
-
-clean_gobike['start_station_id'] = clean_gobike.start_station_id.str[:-2]
-clean_gobike['end_station_id'] = clean_gobike.end_station_id.str[:-2]
-
+# Store the start_station_id, end_station_id and bike_id values as integers, so the '.0' attached to the station ids goes away. Station names can be looked up from the ids with `gobike.station_table`
 
 # ##### Test
 
@@ -363,15 +259,19 @@ clean_gobike[['start_station_id', "end_station_id"]].head(2)
 
 
 # numerical statistics for duration
-clean_gobike.duration_mins.describe()
+summary.describe('duration_mins')
 
 
 # In[32]:
 
 
 # distribution of duration of trips
-bins = np.arange(1, clean_gobike['duration_mins'].max()+100, 100)
-plt.hist(data = clean_gobike, x = 'duration_mins', bins = bins, facecolor = 'g')
+from gobike.binning import AGE_LOG_BINS, DURATION_LOG_BINS, Histograms, linear_bins
+from gobike.plotting import hist_barplot
+
+bins = linear_bins(1, clean_gobike['duration_mins'].max(), 100)
+duration = Histograms.from_trips(clean_gobike, 'duration_mins', bins)
+hist_barplot(duration.counts(), bins.edges, facecolor = 'g')
 plt.title("Distribution of rider's trip duration in minutes")
 plt.xlabel('Duration (mins)')
 plt.ylabel('Number of trips');
@@ -381,7 +281,7 @@ plt.ylabel('Number of trips');
 
 
 # log type numerical statistics for duration
-np.log10(clean_gobike.duration_mins.describe())
+np.log10(summary.describe('duration_mins'))
 
 
 # In[34]:
@@ -389,8 +289,8 @@ np.log10(clean_gobike.duration_mins.describe())
 
 # distribution of duration of trips using log transformation
 plt.figure(figsize = (15, 5))
-bins = 10 ** np.arange(0.008, 3.2+0.05, 0.05)
-plt.hist(data = clean_gobike, x = 'duration_mins', bins = bins, facecolor = 'g', rwidth = .7)
+log_duration = Histograms.from_trips(clean_gobike, 'duration_mins', DURATION_LOG_BINS)
+hist_barplot(log_duration.counts(), DURATION_LOG_BINS.edges, facecolor = 'g', rwidth = .7)
 ticker = [0, 1, 2, 3, 4, 6, 8, 12, 20, 30, 40, 80]
 label = ['{}'.format(v) for v in ticker]
 plt.xscale('log')
@@ -417,11 +317,24 @@ clean_gobike['start_station_name'].value_counts()
 # In[36]:
 
 
-# create a subset of first 10 station names with highest frequency
-station = ['Market St at 10th St', 'San Francisco Caltrain Station 2  (Townsend St at 4th St)', 'Berry St at 4th St', 'Montgomery St BART Station (Market St at 2nd St)', 
-           'Powell St BART Station (Market St at 4th St)', 'San Francisco Caltrain (Townsend St at 4th St)', 'San Francisco Ferry Building (Harry Bridges Plaza)', 
-           'Howard St at Beale St', 'Steuart St at Market St', 'Powell St BART Station (Market St at 5th St)']
-gobike10 = clean_gobike.loc[clean_gobike['start_station_name'].isin(station)]
+# create a subset of the first 10 stations with highest frequency
+from gobike import BitmapIndex, TripCube, cached_top_stations, with_log_columns
+from gobike.plotting import count_barplot, sketch_boxplot, sketch_violinplot
+from gobike.sketches import QuantileSketch
+
+# log10 of duration and age, added once to the whole dataset so that the subset carries them
+clean_gobike = with_log_columns(clean_gobike)
+
+station = cached_top_stations('201902-fordgobike-tripdata.csv', 10)
+# bitmaps of the gender, user type, day and time of the day levels and of the top stations:
+# counts of any combination of them are answered without copying the rows
+bitmaps = BitmapIndex.from_trips(clean_gobike, stations = station)
+gobike10 = clean_gobike.take(bitmaps.rows(start_station_id = station))
+# trip counts of the subset per station, day, time of the day, user type and gender
+cube = TripCube.from_trips(gobike10)
+# quantile sketches of age and duration per station, day, time of the day and user type for the box and violin plots
+age_sketch = QuantileSketch.from_trips(gobike10, 'age')
+duration_sketch = QuantileSketch.from_trips(gobike10, 'duration_mins')
 
 
 # In[37]:
@@ -437,10 +350,10 @@ gobike10['start_station_name'].value_counts()
 
 
 # create a countplot for top 10 stations
-ordr = gobike10.start_station_name.value_counts().index
+ordr = cube.count('start_station_name').sort_values(ascending = False).index
 plt.figure(figsize = (15, 8))
 colour = sb.color_palette()[2]
-sb.countplot(data = gobike10, y = 'start_station_name', color = colour, order = ordr)
+count_barplot(cube.count('start_station_name'), y = 'start_station_name', color = colour, order = ordr)
 plt.title('Top 10 stations with most trip')
 plt.ylabel('Stations name');
 
@@ -453,7 +366,7 @@ plt.ylabel('Stations name');
 
 
 # log type numerical statistics for duration
-np.log10(gobike10.duration_mins.describe())
+np.log10(summary.describe('duration_mins', start_station_id = station))
 
 
 # In[40]:
@@ -461,8 +374,7 @@ np.log10(gobike10.duration_mins.describe())
 
 # lets plot the distribution of duration of trips for our top 10 stations with huge traffic using log transformation
 plt.figure(figsize = (15, 5))
-bins = 10 ** np.arange(0.008, 3.2+0.05, 0.05)
-plt.hist(data = gobike10, x = 'duration_mins', bins = bins, facecolor = 'g', rwidth = .7)
+hist_barplot(log_duration.counts(station), DURATION_LOG_BINS.edges, facecolor = 'g', rwidth = .7)
 ticker = [0, 1, 2, 3, 4, 6, 8, 12, 20, 30, 40, 80]
 label = ['{}'.format(v) for v in ticker]
 plt.xscale('log')
@@ -481,7 +393,7 @@ plt.ylabel('Number of trips');
 
 
 # numerical statistics for age
-gobike10.age.describe()
+summary.describe('age', start_station_id = station)
 
 
 # In[42]:
@@ -489,8 +401,9 @@ gobike10.age.describe()
 
 # age distribution in top 10 stations
 plt.figure(figsize = (7, 5))
-bins = np.arange(10, gobike10.age.max()+2, 2)
-plt.hist(data = gobike10, x = 'age', bins = bins, facecolor = 'g', rwidth = 0.8)
+bins = linear_bins(10, cube.stats('age')['max'], 2)
+age = Histograms.from_trips(gobike10, 'age', bins)
+hist_barplot(age.counts(), bins.edges, facecolor = 'g', rwidth = 0.8)
 plt.xlabel('Age distribution')
 plt.ylabel('Number of trips');
 
@@ -500,7 +413,7 @@ plt.ylabel('Number of trips');
 # In[43]:
 
 
-np.log10(gobike10.age.describe())
+np.log10(summary.describe('age', start_station_id = station))
 
 
 # In[44]:
@@ -508,8 +421,8 @@ np.log10(gobike10.age.describe())
 
 # age distribution in top 10 station using log scale for the x-axis transformation
 plt.figure(figsize = (15, 5))
-bins = 10 ** np.arange(1.2, 2.2+0.02, 0.02)
-plt.hist(data = gobike10, x = 'age', bins = bins, facecolor = 'g', rwidth = 0.8)
+log_age = Histograms.from_trips(gobike10, 'age', AGE_LOG_BINS)
+hist_barplot(log_age.counts(), AGE_LOG_BINS.edges, facecolor = 'g', rwidth = 0.8)
 plt.xscale('log')
 ticker = [15, 20, 30, 40, 60, 80, 100, 150]
 plt.xticks(ticker, ticker)
@@ -525,15 +438,15 @@ plt.ylabel('Number of trips');
 # In[45]:
 
 
-print(gobike10['start_day'].describe())
-gobike10['end_day'].describe()
+print(summary.describe('start_day', start_station_id = station))
+summary.describe('end_day', start_station_id = station)
 
 
 # In[46]:
 
 
-print(gobike10['start_day'].value_counts())
-gobike10['end_day'].value_counts()
+print(bitmaps.counts('start_day', start_station_id = station).sort_values(ascending = False))
+bitmaps.counts('end_day', start_station_id = station).sort_values(ascending = False)
 
 
 # In[47]:
@@ -544,12 +457,12 @@ plt.figure(figsize = (20, 5))
 plt.suptitle('Number of Weekly Rides in Top 10 Stations')
 plt.subplot(1, 2, 1)
 colour = sb.color_palette()[2]
-sb.countplot(data = gobike10, x = 'start_day', color = colour)
+count_barplot(cube.count('start_day'), x = 'start_day', color = colour)
 plt.xlabel('Start Days of the Week')
 plt.ylabel('Number of trips')
 
 plt.subplot(1, 2, 2)
-sb.countplot(data = gobike10, x = 'end_day', color = colour)
+count_barplot(bitmaps.counts('end_day', start_station_id = station), x = 'end_day', color = colour)
 plt.xlabel('End Days of the Week')
 plt.ylabel('Number of trips');
 
@@ -561,13 +474,13 @@ plt.ylabel('Number of trips');
 # In[48]:
 
 
-gobike10.day_period.describe()
+summary.describe('day_period', start_station_id = station)
 
 
 # In[49]:
 
 
-gobike10.day_period.value_counts()
+bitmaps.counts('day_period', start_station_id = station).sort_values(ascending = False)
 
 
 # In[50]:
@@ -575,7 +488,7 @@ gobike10.day_period.value_counts()
 
 # time of the day distribution in top 10 stations
 plt.figure(figsize = (10, 5))
-sb.countplot(data = gobike10, x = 'day_period', color = colour)
+count_barplot(cube.count('day_period'), x = 'day_period', color = colour)
 plt.title('Number of Rides for each Time of the Day')
 plt.xlabel('Time of day')
 plt.ylabel('Number of trips');
@@ -588,8 +501,8 @@ plt.ylabel('Number of trips');
 # In[51]:
 
 
-print(gobike10.member_gender.value_counts())
-print(gobike10.user_type.value_counts())
+print(bitmaps.counts('member_gender', start_station_id = station).sort_values(ascending = False))
+print(bitmaps.counts('user_type', start_station_id = station).sort_values(ascending = False))
 
 
 # In[52]:
@@ -597,8 +510,8 @@ print(gobike10.user_type.value_counts())
 
 # plot distribution of gender and user type
 fig, ax = plt.subplots(nrows = 2, figsize = [10, 10])
-sb.countplot(data = gobike10, x = 'member_gender', color = colour, ax = ax[0])
-sb.countplot(data = gobike10, x = 'user_type', color = colour, ax = ax[1])
+count_barplot(cube.count('member_gender'), x = 'member_gender', color = colour, ax = ax[0])
+count_barplot(cube.count('user_type'), x = 'user_type', color = colour, ax = ax[1])
 ax[0].set_title('Number of Trips by Gender')
 ax[0].set_xlabel('Gender')
 ax[0].set_ylabel('Number of trips')
@@ -644,7 +557,7 @@ ax[1].set_ylabel('Number of trips');
 
 
 # correlation matrices for numerical variables 
-sb.heatmap(gobike10.corr(), annot = True, fmt = '.2f', cmap = 'rocket_r', center = 0)
+sb.heatmap(gobike10[['duration_mins', 'age']].corr(), annot = True, fmt = '.2f', cmap = 'rocket_r', center = 0)
 plt.title('Correlation Matrices for Numerical Variables');
 
 
@@ -658,12 +571,7 @@ sb.regplot(data = gobike10, x = 'age', y = 'duration_mins', fit_reg = False, sca
 # In[55]:
 
 
-def log_trans(x, inverse = False):
-    """ Transformation Helper Function """
-    if not inverse:
-        return np.log10(x)
-    else:
-        return np.power(10, x)
+from gobike import log_trans
 
 
 # In[56]:
@@ -671,7 +579,6 @@ def log_trans(x, inverse = False):
 
 # log transformation for both age and duration
 plt.figure(figsize = (7, 5))
-gobike10['log_age'] = gobike10['age'].apply(log_trans)
 sb.regplot(data = gobike10, x = 'log_age', y = 'duration_mins', fit_reg = False, scatter_kws = {'alpha': 1/500})
 plt.yscale('log')
 xtick = [15, 20, 30, 40, 60, 80, 100, 150]
@@ -691,7 +598,7 @@ plt.ylabel('Duration (mins)');
 
 # plot for station and age
 plt.figure(figsize = (10, 5))
-sb.violinplot(data = gobike10, x = 'age', y = 'start_station_name', color = colour, inner = 'quartile', order = ordr)
+sketch_violinplot(age_sketch, x = 'age', y = 'start_station_name', color = colour, order = ordr)
 plt.xscale('log')
 xticker = [15, 20, 30, 40, 60, 80, 100, 150]
 label = ['{}'.format(v) for v in xticker]
@@ -708,7 +615,7 @@ plt.ylabel('Station names');
 
 # plot for station and duration
 plt.figure(figsize = (10, 5))
-sb.boxplot(data = gobike10, x = 'duration_mins', y = 'start_station_name', color = colour, order = ordr)
+sketch_boxplot(duration_sketch, x = 'duration_mins', y = 'start_station_name', color = colour, order = ordr)
 plt.xscale('log')
 plt.xlabel('Duration (mins)');
 ticker = [0.08, 5, 10, 20, 100, 1000]
@@ -726,15 +633,14 @@ plt.ylabel('Station names');
 plt.figure(figsize = (10, 10))
 
 plt.subplot(2, 1, 1)
-cat_count = gobike10.groupby(['start_station_name', 'start_day']).size()
-cat_count = cat_count.reset_index(name = 'count').pivot(index = 'start_station_name', columns = 'start_day', values = 'count')
+cat_count = cube.table('start_station_name', 'start_day')
 sb.heatmap(cat_count, annot = True, fmt = '.1f')
 plt.title('HeatMap showing Relationship between Station and Day of the Week')
 plt.xlabel('Day of the week')
 plt.ylabel('Station names')
 
 plt.subplot(2, 1, 2)
-sb.countplot(data = gobike10, y = 'start_station_name', hue = 'start_day', order = ordr)
+count_barplot(cube.count(['start_station_name', 'start_day']), y = 'start_station_name', hue = 'start_day', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1))
 plt.legend(bbox_to_anchor = (1, 1), title = 'Day of the week')
 plt.title('Plot showing Relationship between Station and Day of the Week')
@@ -750,15 +656,14 @@ plt.ylabel('Station names');
 plt.figure(figsize = (10, 10))
 
 plt.subplot(2, 1, 1)
-cat_count = gobike10.groupby(['start_station_name', 'day_period']).size()
-cat_count = cat_count.reset_index(name = 'count').pivot(index = 'start_station_name', columns = 'day_period', values = 'count')
+cat_count = cube.table('start_station_name', 'day_period')
 sb.heatmap(cat_count, annot = True, fmt = '.1f');
 plt.title('HeatMap showing Relationship between Station and Time of the Day')
 plt.xlabel('Time of the day')
 plt.ylabel('Station names')
 
 plt.subplot(2, 1, 2)
-sb.countplot(data = gobike10, y = 'start_station_name', hue = 'day_period', order = ordr)
+count_barplot(cube.count(['start_station_name', 'day_period']), y = 'start_station_name', hue = 'day_period', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Time of the day')
 plt.title('Plot showing Relationship between Station and Time of the Day')
 plt.ylabel('Station names');
@@ -771,7 +676,7 @@ plt.ylabel('Station names');
 
 # relationship between station and gender
 plt.figure(figsize=(10,6))
-sb.countplot(data = gobike10, y = 'start_station_name', hue = 'member_gender', order = ordr)
+count_barplot(cube.count(['start_station_name', 'member_gender']), y = 'start_station_name', hue = 'member_gender', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Gender')
 plt.title('Plot showing Relationship between Station and Gender')
 plt.ylabel('Station names');
@@ -784,7 +689,7 @@ plt.ylabel('Station names');
 
 # relationship between station and user type
 plt.figure(figsize=(10,6))
-sb.countplot(data = gobike10, y = 'start_station_name', hue = 'user_type', order = ordr)
+count_barplot(cube.count(['start_station_name', 'user_type']), y = 'start_station_name', hue = 'user_type', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'User type')
 plt.title('Plot showing Relationship between Station and User Type')
 plt.ylabel('Station names');
@@ -800,7 +705,7 @@ plt.figure(figsize = (20, 6))
 plt.suptitle('Plot showing Relationship between Time and Age')
 
 plt.subplot(1, 2, 1)
-sb.violinplot(data = gobike10, x = 'age', y = 'start_day', color = colour, inner = 'quartile')
+sketch_violinplot(age_sketch, x = 'age', y = 'start_day', color = colour)
 plt.xscale('log')
 xticker = [15, 20, 30, 40, 60, 80, 100, 150]
 label = ['{}'.format(v) for v in xticker]
@@ -810,7 +715,7 @@ plt.ylabel('Day of the week')
 plt.xlabel('Age');
 
 plt.subplot(1, 2, 2)
-sb.violinplot(data = gobike10, x = 'age', y = 'day_period', color = colour, inner = 'quartile')
+sketch_violinplot(age_sketch, x = 'age', y = 'day_period', color = colour)
 plt.xscale('log')
 xticker = [15, 20, 30, 40, 60, 80, 100, 150]
 label = ['{}'.format(v) for v in xticker]
@@ -830,13 +735,13 @@ plt.figure(figsize = (20, 6))
 plt.suptitle('Plot showing Relationship between Time and User Type')
 
 plt.subplot(1, 2, 1)
-sb.countplot(data = gobike10, y = 'start_day', hue = 'user_type')
+count_barplot(cube.count(['start_day', 'user_type']), y = 'start_day', hue = 'user_type')
 plt.legend(bbox_to_anchor = (1, 1), title = 'User type')
 plt.title('Day of the week and User Type')
 plt.ylabel('Day of the week');
 
 plt.subplot(1, 2, 2)
-sb.countplot(data = gobike10, y = 'day_period', hue = 'user_type')
+count_barplot(cube.count(['day_period', 'user_type']), y = 'day_period', hue = 'user_type')
 plt.legend(bbox_to_anchor = (1, 1), title = 'User type')
 plt.title('Time of the Day and User Type')
 plt.ylabel('Time of the day');
@@ -852,13 +757,13 @@ plt.figure(figsize = (22, 6))
 plt.suptitle('Plot showing Relationship between Time and Gender')
 
 plt.subplot(1, 2, 1)
-sb.countplot(data = gobike10, y = 'start_day', hue = 'member_gender')
+count_barplot(cube.count(['start_day', 'member_gender']), y = 'start_day', hue = 'member_gender')
 plt.legend(bbox_to_anchor = (1, 1), title = 'Gender')
 plt.title('Day of the week and Gender')
 plt.ylabel('Day of the week');
 
 plt.subplot(1, 2, 2)
-sb.countplot(data = gobike10, y = 'day_period', hue = 'member_gender')
+count_barplot(cube.count(['day_period', 'member_gender']), y = 'day_period', hue = 'member_gender')
 plt.legend(bbox_to_anchor = (1, 1), title = 'Gender')
 plt.title('Time of the day and Gender')
 plt.ylabel('Time of the day');
@@ -874,7 +779,7 @@ plt.figure(figsize = (20, 6))
 plt.suptitle('Plot showing Relationship between Time and Duration')
 
 plt.subplot(1, 2, 1)
-sb.boxplot(data = gobike10, x = 'duration_mins', y = 'start_day', color = colour)
+sketch_boxplot(duration_sketch, x = 'duration_mins', y = 'start_day', color = colour)
 plt.xscale('log')
 ticker = [0.08, 10, 100, 1000]
 plt.xticks(ticker, ticker)
@@ -883,7 +788,7 @@ plt.ylabel('Day of the week')
 plt.xlabel('Duration (mins)');
 
 plt.subplot(1, 2, 2)
-sb.boxplot(data = gobike10, x = 'duration_mins', y = 'day_period', color = colour)
+sketch_boxplot(duration_sketch, x = 'duration_mins', y = 'day_period', color = colour)
 plt.xscale('log')
 ticker = [0.08, 10, 100, 1000]
 plt.xticks(ticker, ticker);
@@ -925,12 +830,9 @@ plt.xlabel('Duration (mins)');
 # In[67]:
 
 
-# create a subset of individual gender and user type to investigate time and station location
-gobike_m = gobike10.query('member_gender == "Male"') 
-gobike_f = gobike10.query('member_gender == "Female"')
-gobike_o = gobike10.query('member_gender == "Other"')
-gobike_s = gobike10.query('user_type == "Subscriber"')
-gobike_c = gobike10.query('user_type == "Customer"')
+# groups of the duration sketch of each user type, to investigate time and station location (the gender plots are sliced from the cube)
+subscribers = duration_sketch.frame().query('user_type == "Subscriber"')
+customers = duration_sketch.frame().query('user_type == "Customer"')
 
 
 # In[68]:
@@ -940,19 +842,19 @@ gobike_c = gobike10.query('user_type == "Customer"')
 plt.figure(figsize = (12, 22))
 
 plt.subplot(3, 1, 1)
-sb.countplot(data = gobike_m, y = 'start_station_name', hue = 'start_day', order = ordr)
+count_barplot(cube.count(['start_station_name', 'start_day'], member_gender = 'Male'), y = 'start_station_name', hue = 'start_day', order = ordr)
 plt.legend(title = 'Day of the week')
 plt.ylabel('Station names')
 plt.title('Top 10 Trips in Day of the Week by Male')
 
 plt.subplot(3, 1, 2)
-sb.countplot(data = gobike_f, y = 'start_station_name', hue = 'start_day', order = ordr)
+count_barplot(cube.count(['start_station_name', 'start_day'], member_gender = 'Female'), y = 'start_station_name', hue = 'start_day', order = ordr)
 plt.legend(title = 'Day of the week')
 plt.ylabel('Station names')
 plt.title('Top 10 Trips in Day of the Week by Female')
 
 plt.subplot(3, 1, 3)
-sb.countplot(data = gobike_o, y = 'start_station_name', hue = 'start_day', order = ordr)
+count_barplot(cube.count(['start_station_name', 'start_day'], member_gender = 'Other'), y = 'start_station_name', hue = 'start_day', order = ordr)
 plt.legend(title = 'Day of the week')
 plt.ylabel('Station names')
 plt.title('Top 10 Trips in Day of the Week by Other');
@@ -967,19 +869,19 @@ plt.title('Top 10 Trips in Day of the Week by Other');
 plt.figure(figsize = (12, 20))
 
 plt.subplot(3, 1, 1)
-sb.countplot(data = gobike_m, y = 'start_station_name', hue = 'day_period', order = ordr)
+count_barplot(cube.count(['start_station_name', 'day_period'], member_gender = 'Male'), y = 'start_station_name', hue = 'day_period', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Time of the day')
 plt.ylabel('Station names');
 plt.title('Top 10 Trips in Time of the Day by Male')
 
 plt.subplot(3, 1, 2)
-sb.countplot(data = gobike_f, y = 'start_station_name', hue = 'day_period', order = ordr)
+count_barplot(cube.count(['start_station_name', 'day_period'], member_gender = 'Female'), y = 'start_station_name', hue = 'day_period', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Time of the day')
 plt.ylabel('Station names');
 plt.title('Top 10 Trips in Time of the Day by Female')
 
 plt.subplot(3, 1, 3)
-sb.countplot(data = gobike_o, y = 'start_station_name', hue = 'day_period', order = ordr)
+count_barplot(cube.count(['start_station_name', 'day_period'], member_gender = 'Other'), y = 'start_station_name', hue = 'day_period', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Time of the day')
 plt.ylabel('Station names')
 plt.title('Top 10 Trips in Time of the Day by Other');
@@ -994,14 +896,14 @@ plt.title('Top 10 Trips in Time of the Day by Other');
 plt.figure(figsize = (12, 14))
 
 plt.subplot(2, 1, 1)
-sb.countplot(data = gobike_s, y = 'start_station_name', hue = 'start_day', order = ordr)
+count_barplot(cube.count(['start_station_name', 'start_day'], user_type = 'Subscriber'), y = 'start_station_name', hue = 'start_day', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1))
 plt.legend(bbox_to_anchor = (1, 1), title = 'Day of the week')
 plt.ylabel('Station names');
 plt.title('Top 10 Trips in Day of the Week by Subscriber')
 
 plt.subplot(2, 1, 2)
-sb.countplot(data = gobike_c, y = 'start_station_name', hue = 'start_day', order = ordr)
+count_barplot(cube.count(['start_station_name', 'start_day'], user_type = 'Customer'), y = 'start_station_name', hue = 'start_day', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1))
 plt.legend(bbox_to_anchor = (1, 1), title = 'Day of the week')
 plt.ylabel('Station names')
@@ -1017,13 +919,13 @@ plt.title('Top 10 Trips in Day of the Week by Customer');
 plt.figure(figsize = (12, 14))
 
 plt.subplot(2, 1, 1)
-sb.countplot(data = gobike_s, y = 'start_station_name', hue = 'day_period', order = ordr)
+count_barplot(cube.count(['start_station_name', 'day_period'], user_type = 'Subscriber'), y = 'start_station_name', hue = 'day_period', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Time of the day')
 plt.ylabel('Station names');
 plt.title('Top 10 Trips in Time of the Day by Subscriber')
 
 plt.subplot(2, 1, 2)
-sb.countplot(data = gobike_c, y = 'start_station_name', hue = 'day_period', order = ordr)
+count_barplot(cube.count(['start_station_name', 'day_period'], user_type = 'Customer'), y = 'start_station_name', hue = 'day_period', order = ordr)
 plt.legend(bbox_to_anchor = (1, 1), title = 'Time of the day')
 plt.ylabel('Station names')
 plt.title('Top 10 Trips in Time of the Day by Customer');
@@ -1043,8 +945,9 @@ order = gobike10.start_station_id.value_counts().index
 
 
 # plot of the age by day of the week in top 10 stations
-g = sb.FacetGrid(data = gobike10, col = 'start_day', col_wrap = 3)
-g.map(sb.violinplot, 'start_station_id', 'age', order = order, color = colour, inner = 'quartile');
+g = sb.FacetGrid(data = age_sketch.frame(), col = 'start_day', col_wrap = 3)
+g.map_dataframe(sketch_violinplot, sketch = age_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'age');
 plt.yscale('log');
 ticker = [15, 20, 30, 40, 60, 80, 100, 150]
 plt.yticks(ticker, ticker)
@@ -1058,8 +961,9 @@ g.fig.suptitle('Relationship between Age and Station by Day of the Week');
 
 
 # plot of the age by time of the day in top 10 stations
-g = sb.FacetGrid(data = gobike10, col = 'day_period', col_wrap = 3)
-g.map(sb.violinplot, 'start_station_id', 'age', order = order, color = colour, inner = 'quartile')
+g = sb.FacetGrid(data = age_sketch.frame(), col = 'day_period', col_wrap = 3)
+g.map_dataframe(sketch_violinplot, sketch = age_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'age')
 plt.yscale('log')
 ticker = [15, 20, 30, 40, 60, 80, 100, 150]
 plt.yticks(ticker, ticker);
@@ -1071,8 +975,9 @@ plt.yticks(ticker, ticker);
 
 
 # plot of the duration by day of the week in top 10 stations
-g = sb.FacetGrid(data = gobike10, col = 'start_day', col_wrap = 3)
-g.map(sb.boxplot, 'start_station_id', 'duration_mins', order = order, color = colour);
+g = sb.FacetGrid(data = duration_sketch.frame(), col = 'start_day', col_wrap = 3)
+g.map_dataframe(sketch_boxplot, sketch = duration_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'duration_mins');
 plt.yscale('log')
 ticker = [0.08, 10, 20, 100, 1000]
 plt.yticks(ticker, ticker)
@@ -1086,8 +991,9 @@ g.fig.suptitle('Relationship between Duration and Station by Day of the Week');
 
 
 # plot of the duration by time of the day in top 10 stations
-g = sb.FacetGrid(data = gobike10, col = 'day_period', col_wrap = 3)
-g.map(sb.boxplot, 'start_station_id', 'duration_mins', order = order, color = colour);
+g = sb.FacetGrid(data = duration_sketch.frame(), col = 'day_period', col_wrap = 3)
+g.map_dataframe(sketch_boxplot, sketch = duration_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'duration_mins');
 plt.yscale('log')
 ticker = [0.08, 10, 20, 100, 1000]
 plt.yticks(ticker, ticker);
@@ -1099,8 +1005,9 @@ plt.yticks(ticker, ticker);
 
 
 # plot of the duration of subscribers trips by day of the week in top 10 stations
-g = sb.FacetGrid(data = gobike_s, col = 'start_day', col_wrap = 3)
-g.map(sb.boxplot, 'start_station_id', 'duration_mins', order = order, color = colour);
+g = sb.FacetGrid(data = subscribers, col = 'start_day', col_wrap = 3)
+g.map_dataframe(sketch_boxplot, sketch = duration_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'duration_mins');
 plt.yscale('log')
 ticker = [0.08, 10, 20, 100, 1000]
 plt.yticks(ticker, ticker)
@@ -1114,8 +1021,9 @@ g.fig.suptitle('Relationship between Duration and Station by Day of the Week for
 
 
 # plot of the duration of subscribers trips by time of the day in top 10 stations
-g = sb.FacetGrid(data = gobike_s, col = 'day_period', col_wrap = 3)
-g.map(sb.boxplot, 'start_station_id', 'duration_mins', order = order, color = colour);
+g = sb.FacetGrid(data = subscribers, col = 'day_period', col_wrap = 3)
+g.map_dataframe(sketch_boxplot, sketch = duration_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'duration_mins');
 plt.yscale('log')
 ticker = [0.08, 10, 20, 100, 1000]
 plt.yticks(ticker, ticker);
@@ -1127,8 +1035,9 @@ plt.yticks(ticker, ticker);
 
 
 # plot of the duration of customers trips by day of the week in top 10 stations
-g = sb.FacetGrid(data = gobike_c, col = 'start_day', col_wrap = 3)
-g.map(sb.boxplot, 'start_station_id', 'duration_mins', order = order, color = colour);
+g = sb.FacetGrid(data = customers, col = 'start_day', col_wrap = 3)
+g.map_dataframe(sketch_boxplot, sketch = duration_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'duration_mins');
 plt.yscale('log')
 ticker = [0.08, 10, 20, 100, 1000]
 plt.yticks(ticker, ticker)
@@ -1142,8 +1051,9 @@ g.fig.suptitle('Relationship between Duration and Station by Day of the Week for
 
 
 # plot of the duration of customers trips by day of the week in top 10 stations
-g = sb.FacetGrid(data = gobike_c, col = 'day_period', col_wrap = 3)
-g.map(sb.boxplot, 'start_station_id', 'duration_mins', order = order, color = colour);
+g = sb.FacetGrid(data = customers, col = 'day_period', col_wrap = 3)
+g.map_dataframe(sketch_boxplot, sketch = duration_sketch, x = 'start_station_id', order = order, color = colour)
+g.set_axis_labels('start_station_id', 'duration_mins');
 plt.yscale('log')
 ticker = [0.08, 10, 20, 100, 1000]
 plt.yticks(ticker, ticker);
@@ -0,0 +1,48 @@
+"""Time the chaining of the trips of every bike with a pandas group-by and with chain_trips.
+
+pandas sorts the trips by bike and start time and shifts the end
+station and end time within a group-by on the bike; chain_trips sorts
+once on an integer key and shifts the sorted columns. 2.5 million rows
+are about a year of trips.
+
+    PYTHONPATH=. python benchmarks/bench_bikes.py [n_rows ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from synthetic import make_trips
+from gobike import clean_trips
+from gobike.bikes import chain_trips
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def pandas_chains(trips):
+    ordered = trips.sort_values(['bike_id', 'start_time'], kind = 'stable')
+    bikes = ordered.groupby('bike_id')
+    previous = bikes['end_station_id'].shift(1)
+    idle = ordered['start_time'] - bikes['end_time'].shift(1)
+    moved = (previous.notna() & ordered['start_station_id'].notna() & (ordered['start_station_id'] != previous))
+    return ordered.assign(previous_station_id = previous, idle = idle, rebalanced = moved.fillna(False))
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 2_500_000)
+    print('{:>11} {:>12} {:>12} {:>12}'.format('rows', 'pandas (s)', 'chains (s)', 'moves'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(int(n_rows)))
+        grouped, expected = timed(lambda: pandas_chains(trips))
+        chained, chains = timed(lambda: chain_trips(trips))
+        assert np.array_equal(expected['rebalanced'].to_numpy(dtype = bool), chains['rebalanced'].to_numpy())
+        assert expected['idle'].equals(chains['idle'])
+        print('{:>11,} {:>12.3f} {:>12.3f} {:>12,}'.format(int(n_rows), grouped, chained, chains['rebalanced'].sum()))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,52 @@
+"""Time the duration histograms of the whole data and of the top 10 stations.
+
+plt.hist bins the trip rows again for every figure; the Histograms are
+built once and the top 10 histogram is a sum of station rows.
+
+    PYTHONPATH=. python benchmarks/bench_binning.py [n_rows ...]
+"""
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+from synthetic import make_trips  # noqa: E402
+from gobike import clean_trips, in_stations, top_n_stations  # noqa: E402
+from gobike.binning import DURATION_LOG_BINS, Histograms  # noqa: E402
+from gobike.plotting import hist_barplot  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    plt.close('all')
+    return time.perf_counter() - start
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    edges = DURATION_LOG_BINS.edges
+    print('{:>11} {:>13} {:>15} {:>17}'.format('rows', 'plt.hist (s)', 'histograms (s)', 'hist_barplot (s)'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(n_rows))
+        station = top_n_stations(trips, 10)
+
+        def rows():
+            plt.hist(data = trips, x = 'duration_mins', bins = edges, rwidth = .7)
+            plt.hist(data = trips.loc[in_stations(trips, station)], x = 'duration_mins', bins = edges, rwidth = .7)
+
+        start = time.perf_counter()
+        duration = Histograms.from_trips(trips, 'duration_mins', DURATION_LOG_BINS)
+        build = time.perf_counter() - start
+
+        def counts():
+            hist_barplot(duration.counts(), edges, rwidth = .7)
+            hist_barplot(duration.counts(station), edges, rwidth = .7)
+
+        print('{:>11,} {:>13.2f} {:>15.2f} {:>17.2f}'.format(n_rows, timed(rows), build, timed(counts)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
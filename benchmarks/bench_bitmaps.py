@@ -0,0 +1,55 @@
+"""Time the gender and user type subsets of the top stations with query() and with a BitmapIndex.
+
+query() copies the matching rows of every subset; the bitmap index is
+built once per dataset and answers the row positions and counts of any
+combination of filters with bitwise ANDs.
+
+    PYTHONPATH=. python benchmarks/bench_bitmaps.py [n_rows ...]
+"""
+import sys
+import time
+
+from synthetic import make_trips
+from gobike import BitmapIndex, clean_trips, in_stations, top_n_stations
+from gobike.ingest import station_id_strings
+
+# the five subsets of Part1 and Part2, and a conjunction of three filters
+SUBSETS = [
+    ('member_gender == "Male"', {'member_gender': 'Male'}),
+    ('member_gender == "Female"', {'member_gender': 'Female'}),
+    ('member_gender == "Other"', {'member_gender': 'Other'}),
+    ('user_type == "Subscriber"', {'user_type': 'Subscriber'}),
+    ('user_type == "Customer"', {'user_type': 'Customer'}),
+    ('user_type == "Customer" and member_gender == "Female" and day_period == "night"',
+     {'user_type': 'Customer', 'member_gender': 'Female', 'day_period': 'night'}),
+]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    print('{:>11} {:>10} {:>10} {:>10} {:>11}'.format('rows', 'query (s)', 'index (s)', 'rows (s)', 'counts (s)'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(int(n_rows)))
+        top = top_n_stations(trips, 10)
+        gobike10 = trips.loc[in_stations(trips, top)]
+        copies, subsets = timed(lambda: [gobike10.query(expression) for expression, _ in SUBSETS])
+        build, bitmaps = timed(lambda: BitmapIndex.from_trips(trips, stations = top))
+        rows, positions = timed(lambda: [bitmaps.rows(start_station_id = top, **filters) for _, filters in SUBSETS])
+        counts, _ = timed(lambda: [bitmaps.count(start_station_id = top, **filters) for _, filters in SUBSETS])
+        assert all((trips.index[found] == subset.index).all() for found, subset in zip(positions, subsets))
+        # archives mixing months with ids like 'SF-G27' keep the station ids as strings
+        text = trips.assign(start_station_id = station_id_strings(trips['start_station_id']))
+        strings = BitmapIndex.from_trips(text, stations = [str(station) for station in top])
+        assert all((strings.rows(start_station_id = [str(station) for station in top], **filters) == found).all()
+                   for (_, filters), found in zip(SUBSETS, positions))
+        print('{:>11,} {:>10.4f} {:>10.4f} {:>10.4f} {:>11.4f}'.format(int(n_rows), copies, build, rows, counts))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
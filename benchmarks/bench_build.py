@@ -0,0 +1,36 @@
+"""Build the slide deck from an empty cache, then again with nothing changed.
+
+    PYTHONPATH=. python benchmarks/bench_build.py [trip csv] [processes]
+
+The deck and its cache are written to a temporary directory.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+from gobike import DeckBuild
+from gobike.ingest import DATA_FILE
+
+
+def timed(build, processes):
+    start = time.perf_counter()
+    status = build.run(processes)
+    return time.perf_counter() - start, status
+
+
+def main(path=DATA_FILE, processes=None):
+    matplotlib.use('Agg')
+    processes = int(processes) if processes else None
+    with tempfile.TemporaryDirectory() as out_dir:
+        kwargs = dict(cache_dir = os.path.join(out_dir, 'cache'), target = os.path.join(out_dir, 'deck.html'))
+        cold, status = timed(DeckBuild(path, **kwargs), processes)
+        warm, again = timed(DeckBuild(path, **kwargs), processes)
+    print('cold build {:.2f}s ({} nodes built)'.format(cold, list(status.values()).count('built')))
+    print('no-op build {:.2f}s ({} nodes built)'.format(warm, list(again.values()).count('built')))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,59 @@
+"""Compare building start_day/day_period from names and from int8 codes.
+
+The name path is the one the notebooks used: .dt.day_name() and a string
+day_period column, cast to ordered categoricals afterwards. Memory is the
+peak RSS above the RSS after the start times are built, per million rows.
+
+    PYTHONPATH=. python benchmarks/bench_categories.py [n_rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from measure import mb, run_isolated
+
+
+def start_times(n_rows):
+    rng = np.random.default_rng(0)
+    return pd.Series(pd.Timestamp(2019, 2, 1) + pd.to_timedelta(rng.integers(0, 28 * 86400, n_rows), unit = 's'))
+
+
+def from_names(times):
+    from gobike.cleaning import DAY_PERIOD_TYPE, DAY_TYPE
+    start_day = times.dt.day_name().astype(DAY_TYPE)
+    period = times.dt.hour
+    day_period = pd.Series('morning', index = times.index)
+    day_period[(period >= 12) & (period <= 17)] = 'afternoon'
+    day_period[(period >= 18) & (period <= 23)] = 'night'
+    return start_day, day_period.astype(DAY_PERIOD_TYPE)
+
+
+def from_codes(times):
+    from gobike.cleaning import day_period, hour, weekday
+    return weekday(times), day_period(hour(times))
+
+
+def run(n_rows, build):
+    from measure import peak_rss, reset_peak_rss
+    times = start_times(n_rows)
+    reset_peak_rss()
+    before = peak_rss()
+    start = time.perf_counter()
+    start_day, day_period = build(times)
+    seconds = time.perf_counter() - start
+    return seconds, peak_rss() - before, start_day.memory_usage(deep = True) + day_period.memory_usage(deep = True)
+
+
+def main(n_rows = 5_000_000):
+    millions = n_rows / 1e6
+    print('{:,} rows, figures per million rows'.format(n_rows))
+    print('{:<8} {:>9} {:>15} {:>14}'.format('path', 'time (s)', 'peak RSS (MB)', 'result (MB)'))
+    for name, build in [('names', from_names), ('codes', from_codes)]:
+        seconds, peak, size = run_isolated(run, n_rows, build)[2]
+        print('{:<8} {:>9.3f} {:>15.1f} {:>14.1f}'.format(name, seconds / millions, mb(peak) / millions, mb(size) / millions))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
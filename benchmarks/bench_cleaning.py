@@ -0,0 +1,82 @@
+"""Compare clean_trips() with the copy/insert/drop cleaning it replaced.
+
+Both start from the same raw dataframe, loaded inside the measured process,
+and report their time and their peak RSS above the RSS after loading.
+
+    PYTHONPATH=. python benchmarks/bench_cleaning.py [n_rows | path.csv]
+"""
+import calendar
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from measure import mb, run_isolated
+from synthetic import write_trips
+
+
+def copy_and_drop(gobike):
+    """ The cleaning cells of the notebooks before gobike.clean_trips """
+    clean_gobike = gobike.copy()
+    clean_gobike['age'] = clean_gobike['member_birth_year'].apply(lambda x: 2019 - x)
+    clean_gobike[['start_time', 'end_time']] = clean_gobike[['start_time', 'end_time']].apply(pd.to_datetime)
+    clean_gobike['start_month'] = clean_gobike['start_time'].apply(lambda time: time.month)
+    clean_gobike['start_month'] = clean_gobike['start_month'].apply(lambda x: calendar.month_abbr[x])
+    clean_gobike.insert(2, 'start_day', clean_gobike['start_time'].dt.day_name(), True)
+    clean_gobike.insert(4, 'end_day', clean_gobike['end_time'].dt.day_name(), True)
+    clean_gobike['period'] = clean_gobike['start_time'].apply(lambda time: time.hour)
+    clean_gobike['day_period'] = 'morning'
+    clean_gobike.loc[(clean_gobike['period'] >= 12) & (clean_gobike['period'] <= 17), 'day_period'] = 'afternoon'
+    clean_gobike.loc[(clean_gobike['period'] >= 18) & (clean_gobike['period'] <= 23), 'day_period'] = 'night'
+    clean_gobike.insert(1, 'duration_mins', clean_gobike['duration_sec']/60, True)
+    clean_gobike['duration_mins'] = round(clean_gobike['duration_mins'], 2)
+    clean_gobike.drop(['duration_sec', 'start_station_latitude', 'start_station_longitude', 'end_station_latitude',
+                       'end_station_longitude', 'bike_share_for_all_trip', 'member_birth_year', 'start_month', 'period'],
+                      axis = 1, inplace = True)
+    clean_gobike.dropna(inplace = True)
+    clean_gobike[['bike_id', 'start_station_id', 'end_station_id']] = clean_gobike[['bike_id', 'start_station_id', 'end_station_id']].astype(str)
+    clean_gobike['age'] = clean_gobike['age'].astype(int)
+    variables = {'start_day': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+                 'end_day': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+                 'day_period': ['morning', 'afternoon', 'night']}
+    for var in variables:
+        order_var = pd.api.types.CategoricalDtype(ordered = True, categories = variables[var])
+        clean_gobike[var] = clean_gobike[var].astype(order_var)
+    clean_gobike['start_station_id'] = clean_gobike.start_station_id.str[:-2]
+    clean_gobike['end_station_id'] = clean_gobike.end_station_id.str[:-2]
+    return clean_gobike
+
+
+def one_pass(gobike):
+    from gobike.cleaning import clean_trips
+    return clean_trips(gobike)
+
+
+def clean(path, cleaner):
+    from measure import peak_rss, reset_peak_rss
+    import time
+    gobike = pd.read_csv(path)
+    reset_peak_rss()
+    loaded = peak_rss()
+    start = time.perf_counter()
+    rows = len(cleaner(gobike))
+    return time.perf_counter() - start, peak_rss() - loaded, rows
+
+
+def main(source = '2500000'):
+    if os.path.exists(source):
+        path = source
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'trips.csv')
+        write_trips(path, int(source))
+
+    print('{} ({:.0f} MB)'.format(path, mb(os.path.getsize(path))))
+    print('{:<15} {:>9} {:>26} {:>10}'.format('cleaning', 'time (s)', 'peak RSS over raw (MB)', 'rows'))
+    for name, cleaner in [('copy_and_drop', copy_and_drop), ('clean_trips', one_pass)]:
+        seconds, peak, rows = run_isolated(clean, path, cleaner)[2]
+        print('{:<15} {:>9.2f} {:>26.0f} {:>10,}'.format(name, seconds, mb(peak), rows))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
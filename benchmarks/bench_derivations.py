@@ -0,0 +1,56 @@
+"""Benchmark the age, month and hour derivations of the cleaning pipeline.
+
+Compares the per-row .apply(lambda ...) versions that used to run in the
+notebooks with the column-wise versions in gobike.cleaning.
+
+    PYTHONPATH=. python benchmarks/bench_derivations.py [n_rows]
+"""
+import calendar
+import sys
+import time
+
+import pandas as pd
+
+from synthetic import make_trips
+from gobike.cleaning import hour, month_abbr, rider_age
+
+
+def timed(func, *args):
+    """ Return (seconds, result) of a single call """
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def lambda_age(birth_year):
+    return birth_year.apply(lambda x: 2019 - x)
+
+
+def lambda_month(times):
+    month = times.apply(lambda time: time.month)
+    return month.apply(lambda x: calendar.month_abbr[x])
+
+
+def lambda_hour(times):
+    return times.apply(lambda time: time.hour)
+
+
+def main(n_rows = 2_500_000):
+    trips = make_trips(n_rows)
+    times = pd.to_datetime(trips['start_time'])
+    cases = [('age', lambda_age, rider_age, trips['member_birth_year']),
+             ('start_month', lambda_month, month_abbr, times),
+             ('period', lambda_hour, hour, times)]
+
+    print('{:,} rows'.format(n_rows))
+    print('{:<12} {:>10} {:>12} {:>9}'.format('column', 'apply (s)', 'vector (s)', 'speedup'))
+    for name, slow, fast, column in cases:
+        slow_time, expected = timed(slow, column)
+        fast_time, result = timed(fast, column)
+        pd.testing.assert_series_equal(pd.Series(result, dtype = object), pd.Series(expected, dtype = object),
+                                       check_names = False)
+        print('{:<12} {:>10.3f} {:>12.4f} {:>8.0f}x'.format(name, slow_time, fast_time, slow_time / fast_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,37 @@
+"""Render the registered slide figures one after the other and on a process pool.
+
+    PYTHONPATH=. python benchmarks/bench_figures.py [trip csv] [processes]
+
+The cleaning cache is written before the timed runs, so both runs read
+it and build the aggregates once before drawing.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from gobike import FigureData, render_figures
+from gobike.ingest import DATA_FILE
+
+
+def timed(**kwargs):
+    start = time.perf_counter()
+    rendered = render_figures(**kwargs)
+    return time.perf_counter() - start, rendered
+
+
+def main(path=DATA_FILE, processes=None):
+    processes = int(processes) if processes else os.cpu_count()
+    FigureData(path).cache_file
+    with tempfile.TemporaryDirectory() as out_dir:
+        serial, rendered = timed(data = FigureData(path), out_dir = out_dir, processes = 1)
+        parallel, _ = timed(data = FigureData(path), out_dir = out_dir, processes = processes)
+    print('{:<28} {:>8}'.format('figure', 'serial (s)'))
+    for name, (_, seconds) in rendered.items():
+        print('{:<28} {:>8.2f}'.format(name, seconds))
+    print('{} figures: serial {:.2f}s, {} processes {:.2f}s, speedup {:.1f}x'.format(
+        len(rendered), serial, processes, parallel, serial / parallel))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,57 @@
+"""Time the hourly departures, arrivals and level of every station with pandas and with StationFlows.
+
+pandas concatenates the start and end events, groups them by hour and
+station and takes the cumulative sum; StationFlows counts the same
+events with one bincount. station_events() is timed against sorting the
+events with sort_values and a group-by cumsum.
+
+    PYTHONPATH=. python benchmarks/bench_flows.py [n_rows ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_trips
+from gobike import clean_trips
+from gobike.flows import StationFlows, station_events
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def pandas_levels(trips):
+    events = pd.concat([pd.DataFrame({'station_id': trips['start_station_id'], 'time': trips['start_time'], 'change': -1}),
+                        pd.DataFrame({'station_id': trips['end_station_id'], 'time': trips['end_time'], 'change': 1})])
+    hourly = events.groupby([events['time'].dt.floor('1h'), 'station_id'])['change'].sum()
+    return hourly.unstack(fill_value = 0).asfreq('1h', fill_value = 0).cumsum()
+
+
+def pandas_events(trips):
+    events = pd.concat([pd.DataFrame({'station_id': trips['start_station_id'], 'time': trips['start_time'], 'change': -1}),
+                        pd.DataFrame({'station_id': trips['end_station_id'], 'time': trips['end_time'], 'change': 1})])
+    events = events.dropna().sort_values(['station_id', 'time', 'change'], kind = 'stable')
+    return events.assign(level = events.groupby('station_id')['change'].cumsum())
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    print('{:>11} {:>12} {:>12} {:>14} {:>14}'.format(
+        'rows', 'pandas (s)', 'flows (s)', 'pandas ev (s)', 'events (s)'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(int(n_rows)))
+        grouped, levels = timed(lambda: pandas_levels(trips))
+        binned, flows = timed(lambda: StationFlows.from_trips(trips))
+        assert np.array_equal(levels.to_numpy(), flows.level().reindex(columns = levels.columns).to_numpy())
+        sorted_, expected = timed(lambda: pandas_events(trips))
+        merged, events = timed(lambda: station_events(trips))
+        assert np.array_equal(expected['level'].to_numpy(), events['level'].to_numpy())
+        print('{:>11,} {:>12.3f} {:>12.3f} {:>14.3f} {:>14.3f}'.format(int(n_rows), grouped, binned, sorted_, merged))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
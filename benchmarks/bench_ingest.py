@@ -0,0 +1,50 @@
+"""Benchmark the typed, column-pruned csv ingest against a plain read_csv.
+
+Writes a synthetic trip csv file (or uses the one given) and reports load
+time, peak RSS of the loading process and the size of the loaded frame.
+
+    PYTHONPATH=. python benchmarks/bench_ingest.py [n_rows | path.csv]
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from measure import baseline_rss, mb, run_isolated
+from synthetic import write_trips
+
+
+def plain_read(path):
+    trips = pd.read_csv(path)
+    trips[['start_time', 'end_time']] = trips[['start_time', 'end_time']].apply(pd.to_datetime)
+    return trips.memory_usage(deep = True).sum()
+
+
+def typed_read(path):
+    from gobike.ingest import read_trips
+    return read_trips(path).memory_usage(deep = True).sum()
+
+
+def typed_read_c(path):
+    from gobike.ingest import read_trips
+    return read_trips(path, engine = 'c').memory_usage(deep = True).sum()
+
+
+def main(source = '2500000'):
+    if os.path.exists(source):
+        path = source
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'trips.csv')
+        write_trips(path, int(source))
+    base = baseline_rss()
+
+    print('{} ({:.0f} MB)'.format(path, mb(os.path.getsize(path))))
+    print('{:<12} {:>9} {:>15} {:>11}'.format('loader', 'time (s)', 'peak RSS (MB)', 'frame (MB)'))
+    for name, loader in [('read_csv', plain_read), ('read_trips', typed_read), ('read_trips/c', typed_read_c)]:
+        seconds, peak, frame = run_isolated(loader, path)
+        print('{:<12} {:>9.2f} {:>15.0f} {:>11.0f}'.format(name, seconds, mb(peak - base), mb(frame)))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,45 @@
+"""Time the origin-destination counts of the trips with a pandas group-by and with an ODMatrix.
+
+The matrix is sliced by hour, start day and user type; the group-by
+counts the same cells. The top routes and station outflows are then
+read from both.
+
+    PYTHONPATH=. python benchmarks/bench_od.py [n_rows ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from synthetic import make_trips
+from gobike import clean_trips
+from gobike.od import ODMatrix
+
+SLICES = ['hour', 'start_day', 'user_type']
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    print('{:>11} {:>12} {:>12} {:>10} {:>12} {:>10}'.format(
+        'rows', 'groupby (s)', 'matrix (s)', 'cells', 'top 10 (s)', 'MB'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(int(n_rows)))
+        hours = trips['start_time'].dt.hour.rename('hour')
+        grouped, cells = timed(lambda: trips.groupby([hours, 'start_day', 'user_type', 'start_station_id',
+                                                      'end_station_id'], observed = True).size())
+        built, matrix = timed(lambda: ODMatrix.from_trips(trips, SLICES))
+        top, routes = timed(lambda: matrix.top_routes(10))
+        pairs = cells.groupby(level = ['start_station_id', 'end_station_id']).sum().nlargest(10)
+        assert len(cells) == len(matrix.keys) and np.array_equal(pairs.to_numpy(), routes['trips'].to_numpy())
+        print('{:>11,} {:>12.3f} {:>12.3f} {:>10,} {:>12.4f} {:>10.1f}'.format(
+            int(n_rows), grouped, built, len(matrix.keys), top, matrix.nbytes / 1e6))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,42 @@
+"""Time a day x user type countplot drawn from rows and from cube counts.
+
+The cube build is timed separately: it is done once per dataset while
+the drawing is repeated for every figure.
+
+    PYTHONPATH=. python benchmarks/bench_plotting.py [n_rows ...]
+"""
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import seaborn as sb  # noqa: E402
+
+from synthetic import make_trips  # noqa: E402
+from gobike import TripCube, clean_trips  # noqa: E402
+from gobike.plotting import count_barplot  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    plt.close('all')
+    return time.perf_counter() - start
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    print('{:>11} {:>14} {:>15} {:>15}'.format('rows', 'countplot (s)', 'cube build (s)', 'from cube (s)'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(n_rows))
+        start = time.perf_counter()
+        cube = TripCube.from_trips(trips)
+        build = time.perf_counter() - start
+        rows = timed(lambda: sb.countplot(data = trips, y = 'start_day', hue = 'user_type'))
+        drawn = timed(lambda: count_barplot(cube.count(['start_day', 'user_type']), y = 'start_day', hue = 'user_type'))
+        print('{:>11,} {:>14.2f} {:>15.2f} {:>15.2f}'.format(n_rows, rows, build, drawn))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
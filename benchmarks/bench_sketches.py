@@ -0,0 +1,61 @@
+"""Time the station x duration boxplot and station x age violinplot drawn from rows and from sketches.
+
+The sketches are built once per dataset while the drawing is repeated
+for every figure; the error column is the largest relative error of the
+sketch quartiles per station against the exact (lower) quartiles.
+
+    PYTHONPATH=. python benchmarks/bench_sketches.py [n_rows ...]
+"""
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import seaborn as sb  # noqa: E402
+
+from synthetic import make_trips  # noqa: E402
+from gobike import clean_trips, in_stations, top_n_stations  # noqa: E402
+from gobike.plotting import sketch_boxplot, sketch_violinplot  # noqa: E402
+from gobike.sketches import QuantileSketch  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    plt.close('all')
+    return time.perf_counter() - start
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    print('{:>11} {:>12} {:>14} {:>17} {:>10}'.format('rows', 'rows (s)', 'sketches (s)', 'from sketch (s)', 'error'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(n_rows))
+        trips = trips.loc[in_stations(trips, top_n_stations(trips, 10))]
+
+        def rows():
+            sb.boxplot(data = trips, x = 'duration_mins', y = 'start_station_id', orient = 'h')
+            plt.figure()
+            sb.violinplot(data = trips, x = 'age', y = 'start_station_id', orient = 'h', inner = 'quartile')
+
+        start = time.perf_counter()
+        duration = QuantileSketch.from_trips(trips, 'duration_mins')
+        age = QuantileSketch.from_trips(trips, 'age')
+        build = time.perf_counter() - start
+
+        def sketched():
+            sketch_boxplot(duration, x = 'duration_mins', y = 'start_station_id')
+            plt.figure()
+            sketch_violinplot(age, x = 'age', y = 'start_station_id')
+
+        exact = trips.groupby('start_station_id')['duration_mins'].quantile([0.25, 0.5, 0.75], interpolation = 'lower')
+        approximate = duration.quantiles(by = 'start_station_id').to_numpy()
+        exact = exact.unstack().to_numpy()
+        error = (np.abs(approximate - exact) / exact).max()
+        print('{:>11,} {:>12.2f} {:>14.2f} {:>17.2f} {:>10.4f}'.format(n_rows, timed(rows), build, timed(sketched), error))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
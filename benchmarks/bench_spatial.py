@@ -0,0 +1,60 @@
+"""Time nearest-station and radius queries against all stations and with a StationIndex.
+
+The stations are those of a synthetic month, the query points are
+scattered about a kilometre around random stations. The brute force
+compares every point with every station.
+
+    PYTHONPATH=. python benchmarks/bench_spatial.py [n_points ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import make_trips
+from gobike.spatial import StationIndex, haversine, read_station_coordinates
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def brute(coordinates, latitude, longitude, k, rows=10_000):
+    """ k nearest station ids and the count of stations within 500 m, comparing with all stations """
+    ids, within = [], 0
+    for block in range(0, len(latitude), rows):
+        distance = haversine(latitude[block:block + rows, None], longitude[block:block + rows, None],
+                             coordinates['latitude'].to_numpy()[None], coordinates['longitude'].to_numpy()[None])
+        ids.append(coordinates.index.to_numpy()[np.argsort(distance, axis = 1)[:, :k]])
+        within += (distance <= 500).sum()
+    return np.concatenate(ids), within
+
+
+def main(*sizes):
+    sizes = sizes or (100_000, 1_000_000)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'trips.csv')
+        make_trips(50_000).to_csv(path, index = False)
+        coordinates = read_station_coordinates(path)
+    index = StationIndex(coordinates)
+    rng = np.random.default_rng(0)
+    print(index)
+    print('{:>11} {:>10} {:>12} {:>12} {:>12}'.format('points', 'brute (s)', 'nearest (s)', 'within (s)', 'matches'))
+    for n_points in sizes:
+        n_points = int(n_points)
+        station = rng.integers(0, len(coordinates), n_points)
+        latitude = coordinates['latitude'].to_numpy()[station] + rng.normal(0, 0.01, n_points)
+        longitude = coordinates['longitude'].to_numpy()[station] + rng.normal(0, 0.01, n_points)
+        slow, (ids, within) = timed(lambda: brute(coordinates, latitude, longitude, 3))
+        nearest, (found, _) = timed(lambda: index.nearest(latitude, longitude, 3))
+        radius, near = timed(lambda: index.within(latitude, longitude, 500))
+        assert np.array_equal(ids, found) and len(near) == within
+        print('{:>11,} {:>10.2f} {:>12.3f} {:>12.3f} {:>12,}'.format(n_points, slow, nearest, radius, len(near)))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,42 @@
+"""Compare the peak memory of cleaning a file at once and chunk by chunk.
+
+    PYTHONPATH=. python benchmarks/bench_streaming.py [n_rows | path.csv] [chunksize]
+"""
+import os
+import sys
+import tempfile
+
+from measure import baseline_rss, mb, run_isolated
+from synthetic import write_trips
+
+
+def in_memory(path):
+    from gobike.cleaning import clean_trips
+    return len(clean_trips(path))
+
+
+def streamed(path, chunksize):
+    from gobike.streaming import stream_trips
+    from pyarrow import parquet
+    return parquet.ParquetFile(stream_trips(path, path + '.parquet', chunksize)).metadata.num_rows
+
+
+def main(source = '2500000', chunksize = '250000'):
+    if os.path.exists(source):
+        path = source
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'trips.csv')
+        write_trips(path, int(source))
+    base = baseline_rss()
+
+    print('{} ({:.0f} MB)'.format(path, mb(os.path.getsize(path))))
+    print('{:<22} {:>9} {:>15} {:>10}'.format('mode', 'time (s)', 'peak RSS (MB)', 'rows'))
+    cases = [('clean_trips', in_memory, (path,)),
+             ('stream_trips {:,}'.format(int(chunksize)), streamed, (path, int(chunksize)))]
+    for name, func, args in cases:
+        seconds, peak, rows = run_isolated(func, *args)
+        print('{:<22} {:>9.2f} {:>15.0f} {:>10,}'.format(name, seconds, mb(peak - base), rows))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,51 @@
+"""Time the describe() cells of Part1 from the rows and from a TripSummary.
+
+The summary is built once per dataset; every describe() view is then
+merged from its partitions.
+
+    PYTHONPATH=. python benchmarks/bench_summary.py [n_rows ...]
+"""
+import sys
+import time
+
+from synthetic import make_trips
+from gobike import TripSummary, clean_trips, in_stations, top_n_stations
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(*sizes):
+    sizes = sizes or (175_000, 1_000_000, 4_000_000)
+    print('{:>11} {:>14} {:>13} {:>16}'.format('rows', 'describe (s)', 'summary (s)', 'from summary (s)'))
+    for n_rows in sizes:
+        trips = clean_trips(make_trips(n_rows))
+        station = top_n_stations(trips, 10)
+
+        def rows():
+            top = trips.loc[in_stations(trips, station)]
+            for frame in (trips, top):
+                frame['duration_mins'].describe()
+                frame['age'].describe()
+            for column in ['start_day', 'end_day', 'day_period']:
+                top[column].describe()
+
+        start = time.perf_counter()
+        summary = TripSummary.from_trips(trips)
+        build = time.perf_counter() - start
+
+        def summarized():
+            for filters in ({}, {'start_station_id': station}):
+                summary.describe('duration_mins', **filters)
+                summary.describe('age', **filters)
+            for column in ['start_day', 'end_day', 'day_period']:
+                summary.describe(column, start_station_id = station)
+
+        print('{:>11,} {:>14.2f} {:>13.2f} {:>16.2f}'.format(n_rows, timed(rows), build, timed(summarized)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
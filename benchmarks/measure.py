@@ -0,0 +1,74 @@
+"""Timing and peak memory of a call, measured in a fresh process.
+
+Each call runs in its own spawned interpreter so that the peak RSS only
+covers that call and not earlier benchmark cases.
+"""
+import multiprocessing
+import resource
+import sys
+import time
+
+
+def peak_rss():
+    """ Peak resident memory of the current process in bytes """
+    # ru_maxrss survives exec on Linux, so a spawned child would report the
+    # parent's peak; VmHWM is reset for every new process image
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def reset_peak_rss():
+    """ Start measuring peak_rss() from the current RSS (Linux only, a no-op elsewhere) """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def _child(func, args, queue):
+    try:
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        queue.put((seconds, peak_rss(), result))
+    except BaseException as error:
+        queue.put(error)
+        raise
+
+
+def run_isolated(func, *args):
+    """ Return (seconds, peak_rss_bytes, result) of func(*args) run in a new process
+
+    func must be importable by name and its result small enough to pickle.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target = _child, args = (func, args, queue))
+    process.start()
+    outcome = queue.get()
+    process.join()
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
+
+def baseline_rss():
+    """ Peak RSS of a spawned process that only imports numpy and pandas """
+    return run_isolated(_noop)[1]
+
+
+def _noop():
+    import pandas  # noqa: F401
+
+
+def mb(n_bytes):
+    return n_bytes / 2 ** 20
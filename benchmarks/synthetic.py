@@ -0,0 +1,62 @@
+"""Synthetic trip tables shaped like the raw Ford GoBike csv files.
+
+The benchmarks need multi-million-row inputs while the real dataset has
+183412 rows, so this generator reproduces its 16 columns, station and
+trip duration skew, and the share of missing station and member data.
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_trips(n_rows = 1_000_000, n_stations = 330, year = 2019, month = 2, seed = 0):
+    """ Return a raw trip dataframe with n_rows rows for one month """
+    rng = np.random.default_rng(seed)
+
+    # a few stations get most of the traffic, like in the real data
+    ids = np.arange(3, 3 + n_stations)
+    names = np.array(['Station {}'.format(i) for i in ids], dtype = object)
+    lat = 37.7 + rng.random(n_stations) * 0.2
+    lon = -122.5 + rng.random(n_stations) * 0.3
+    weight = rng.pareto(1.5, n_stations) + 0.1
+    weight /= weight.sum()
+    start = rng.choice(n_stations, n_rows, p = weight)
+    end = rng.choice(n_stations, n_rows, p = weight)
+
+    days = pd.Period(year = year, month = month, freq = 'M').days_in_month
+    start_time = (pd.Timestamp(year, month, 1)
+                  + pd.to_timedelta(rng.integers(0, days * 86400, n_rows), unit = 's')
+                  + pd.to_timedelta(rng.integers(0, 10000, n_rows) * 100, unit = 'us'))
+    duration = rng.lognormal(6.3, 0.7, n_rows).astype(int) + 61
+    end_time = start_time + pd.to_timedelta(duration, unit = 's')
+
+    trips = pd.DataFrame({
+        'duration_sec': duration,
+        'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S.%f').str[:-2],
+        'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S.%f').str[:-2],
+        'start_station_id': ids[start].astype(float),
+        'start_station_name': names[start],
+        'start_station_latitude': lat[start],
+        'start_station_longitude': lon[start],
+        'end_station_id': ids[end].astype(float),
+        'end_station_name': names[end],
+        'end_station_latitude': lat[end],
+        'end_station_longitude': lon[end],
+        'bike_id': rng.integers(10, 7000, n_rows),
+        'user_type': np.where(rng.random(n_rows) < 0.9, 'Subscriber', 'Customer').astype(object),
+        'member_birth_year': rng.integers(1940, 2001, n_rows).astype(float),
+        'member_gender': rng.choice(np.array(['Male', 'Female', 'Other'], dtype = object), n_rows, p = [0.74, 0.23, 0.03]),
+        'bike_share_for_all_trip': np.where(rng.random(n_rows) < 0.1, 'Yes', 'No').astype(object),
+    })
+
+    # missing station data (~0.1%) and missing member data (~4.5%)
+    missing = rng.random(n_rows) < 0.001
+    trips.loc[missing, ['start_station_id', 'start_station_name', 'end_station_id', 'end_station_name']] = np.nan
+    missing = rng.random(n_rows) < 0.045
+    trips.loc[missing, ['member_birth_year', 'member_gender']] = np.nan
+    return trips
+
+
+def write_trips(path, n_rows = 1_000_000, **kwargs):
+    """ Write a synthetic raw trip csv file and return its path """
+    make_trips(n_rows, **kwargs).to_csv(path, index = False)
+    return path
@@ -0,0 +1,46 @@
+"""Reusable wrangling code for the Ford GoBike System Data analysis.
+
+The names below are imported from their module when first used, so
+`import gobike` itself does not load pandas, pyarrow or matplotlib.
+"""
+import importlib
+
+# name: module it is defined in
+_EXPORTS = {
+    'DATA_FILE': 'cache', 'PIPELINE_VERSION': 'cache',
+    'cached_station_coordinates': 'cache', 'cached_top_stations': 'cache', 'cached_top_table': 'cache',
+    'cached_trips': 'cache',
+    'SCHEMA': 'ingest', 'load_trips': 'ingest', 'read_trips': 'ingest',
+    'DAYS': 'cleaning', 'DAY_PERIODS': 'cleaning', 'clean_trips': 'cleaning',
+    'load_archive': 'archive', 'read_archive': 'archive', 'write_archive': 'archive',
+    'read_streamed': 'streaming', 'stream_trips': 'streaming',
+    'in_stations': 'stations', 'station_names': 'stations', 'station_table': 'stations',
+    'top_n_stations': 'stations',
+    'TripCube': 'cube',
+    'BitmapIndex': 'bitmaps',
+    'ODMatrix': 'od', 'merge_matrices': 'od', 'od_archive': 'od',
+    'StationIndex': 'spatial', 'haversine': 'spatial', 'read_station_coordinates': 'spatial',
+    'trip_distances': 'spatial',
+    'chain_trips': 'bikes', 'rebalancing_moves': 'bikes', 'station_idle_times': 'bikes',
+    'StationFlows': 'flows', 'read_flows': 'flows', 'station_events': 'flows', 'stream_flows': 'flows',
+    'Bins': 'binning', 'Histograms': 'binning', 'linear_bins': 'binning',
+    'log_trans': 'transforms', 'with_log_columns': 'transforms',
+    'QuantileSketch': 'sketches', 'merge_sketches': 'sketches',
+    'TripSummary': 'summary', 'merge_summaries': 'summary', 'summarize_archive': 'summary',
+    'FIGURES': 'figures', 'FigureData': 'figures', 'figure': 'figures', 'render_figures': 'figures',
+    'DeckBuild': 'build',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,112 @@
+"""Command line entry point, python -m gobike <command>.
+
+    python -m gobike slides    write the Part2 slide deck as one HTML file,
+                               redrawing only the figures that changed
+    python -m gobike figures   draw registered figures to PNG/SVG files
+    python -m gobike clean     clean a trip csv into the cache
+    python -m gobike top       print the stations with the most trips
+    python -m gobike flows     write the departures, arrivals and bike
+                               level of every station to a Parquet file
+
+Everything runs headless on matplotlib's Agg backend. The plotting
+modules are only imported by the commands that draw, and top answers
+from the json file next to the cache without importing pandas once the
+csv has been cleaned. python -m gobike --importtime <command> reports
+where the start-up time of a command goes.
+"""
+import argparse
+import sys
+import time
+
+from .cache import CACHE_DIR, DATA_FILE
+
+
+def clean(args):
+    from .cache import cached_trips
+    clean_gobike = cached_trips(args.data, args.cache_dir)
+    print('{} rows x {} columns'.format(*clean_gobike.shape))
+
+
+def top(args):
+    from .cache import cached_top_table
+    for station, name, trips in cached_top_table(args.data, args.n, args.by, args.cache_dir):
+        print('{:>6}  {:<60} {:>7}'.format(station, name, trips))
+
+
+def flows(args):
+    from .flows import stream_flows
+    print(stream_flows(args.data, args.out, args.freq, args.processes, args.cache_dir))
+
+
+def figures(args):
+    _headless()
+    from .figures import FigureData, render_figures
+    rendered = render_figures(args.names or None, FigureData(args.data, args.cache_dir), args.out, args.format,
+                              args.processes)
+    for name, (target, seconds) in rendered.items():
+        print('{:<28} {:>6.2f}s  {}'.format(name, seconds, target))
+
+
+def slides(args):
+    _headless()
+    from .build import DeckBuild
+    build = DeckBuild(args.data, args.script, args.cache_dir, fmt = args.format, target = args.out)
+    for node, status in build.run(args.processes).items():
+        print('{:<36} {}'.format(node, status))
+    print(build.target)
+
+
+def _headless():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def parser():
+    """ Argument parser of the command line """
+    main = argparse.ArgumentParser(prog = 'python -m gobike', description = __doc__.splitlines()[0])
+    main.add_argument('--importtime', action = 'store_true', help = 'report the import time of the command')
+    commands = main.add_subparsers(dest = 'command', required = True)
+
+    def command(name, run, help):
+        sub = commands.add_parser(name, help = help)
+        sub.add_argument('--data', default = DATA_FILE, help = 'trip csv file (default: %(default)s)')
+        sub.add_argument('--cache-dir', default = CACHE_DIR, help = 'cache directory (default: %(default)s)')
+        sub.set_defaults(run = run)
+        return sub
+
+    command('clean', clean, 'clean a trip csv into the cache')
+    sub = command('top', top, 'print the stations with the most trips')
+    sub.add_argument('-n', type = int, default = 10, help = 'number of stations (default: %(default)s)')
+    sub.add_argument('--by', choices = ['start_station_id', 'end_station_id'], default = 'start_station_id')
+    sub = command('flows', flows, 'write the flows of every station to Parquet')
+    sub.add_argument('--freq', default = '1h', help = 'time bins (default: %(default)s)')
+    sub.add_argument('--out', default = 'station_flows.parquet', help = 'Parquet file (default: %(default)s)')
+    sub.add_argument('--processes', type = int, default = None,
+                     help = 'number of counting processes (default: one per cpu)')
+    for sub in (command('figures', figures, 'draw registered figures'),
+                command('slides', slides, 'write the slide deck')):
+        sub.add_argument('--format', choices = ['png', 'svg'], default = 'png')
+        sub.add_argument('--processes', type = int, default = None,
+                         help = 'number of drawing processes (default: one per cpu)')
+    sub = commands.choices['figures']
+    sub.add_argument('names', nargs = '*', help = 'figures to draw (default: all)')
+    sub.add_argument('--out', default = 'figures', help = 'output directory (default: %(default)s)')
+    sub = commands.choices['slides']
+    sub.add_argument('--script', default = 'Ford_GoBike_System_Data_Part2.py', help = 'notebook export of the deck')
+    sub.add_argument('--out', default = None, help = 'deck file (default: <script>.slides.html)')
+    return main
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parser().parse_args(argv)
+    if args.importtime:
+        from .startup import profile_command
+        sys.exit(profile_command([arg for arg in argv if arg != '--importtime']))
+    start = time.perf_counter()
+    args.run(args)
+    print('done in {:.1f}s'.format(time.perf_counter() - start), file = sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
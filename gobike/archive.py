@@ -0,0 +1,113 @@
+"""Loading a whole archive of monthly trip files.
+
+The Ford GoBike / Bay Wheels data is published as one csv file per month.
+load_archive() cleans every month in its own process (through the on-disk
+cache, so a month is only cleaned once), concatenates the results and adds
+the month of each trip back as an ordered 'month' column. The combined
+data can be written to and read back from a Parquet dataset partitioned
+by month.
+"""
+import glob
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .cache import CACHE_DIR, cached_trips
+from .cleaning import clean_trips
+from .ingest import STATION_ID_COLUMNS, station_id_strings
+
+try:
+    import pyarrow as pa
+    from pyarrow import parquet
+except ImportError:
+    pa = None
+
+
+TRIP_FILES = '*tripdata*.csv'
+
+
+def trip_files(source):
+    """ Sorted monthly csv files of a directory, a glob pattern or a list of paths
+
+    Raises ValueError naming source when it holds no file.
+    """
+    if isinstance(source, (list, tuple)):
+        files = sorted(source)
+    else:
+        if os.path.isdir(source):
+            source = os.path.join(source, TRIP_FILES)
+        files = sorted(glob.glob(source))
+    if not files:
+        raise ValueError('no trip files in {!r}'.format(source))
+    return files
+
+
+def clean_month(path, cache_dir=CACHE_DIR):
+    """ Cleaned trip data of one monthly file with its 'month' column ('2019-02') """
+    clean_gobike = cached_trips(path, cache_dir) if cache_dir else clean_trips(path)
+    clean_gobike['month'] = clean_gobike['start_time'].dt.strftime('%Y-%m')
+    return clean_gobike
+
+
+def load_archive(source, processes=None, cache_dir=CACHE_DIR):
+    """ Return the cleaned trips of all monthly files in source as one dataframe
+
+    The files are cleaned in parallel on a pool of processes (os.cpu_count()
+    by default, processes=1 cleans them in this process). Pass cache_dir=None
+    to skip the on-disk cache.
+    """
+    return combine(list(map_months(clean_month, trip_files(source), processes, cache_dir)))
+
+
+def map_months(func, files, processes=None, *args):
+    """ Yield func(path, *args) of every file in order, computed on a pool of processes
+
+    processes=1 (or a single file) runs them in this process. A month is
+    only submitted once the results ahead of it are down to one per
+    process, so a slow consumer (e.g. a writer) does not pile them up.
+    """
+    if processes == 1 or len(files) == 1:
+        for path in files:
+            yield func(path, *args)
+        return
+    ahead = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as pool:
+        running = deque()
+        for path in files:
+            running.append(pool.submit(func, path, *args))
+            if len(running) > ahead:
+                yield running.popleft().result()
+        while running:
+            yield running.popleft().result()
+
+
+def combine(months):
+    """ Concatenate cleaned monthly frames into one frame with a categorical month column """
+    trips = pd.concat(months, ignore_index = True)
+    # the categories of user_type and member_gender can differ from file to file
+    for column in ['user_type', 'member_gender']:
+        trips[column] = trips[column].astype('category')
+    # station ids are integers except in the months that use ids like 'SF-G27',
+    # an archive with both kinds keeps all of them as strings
+    if not all(pd.api.types.is_numeric_dtype(trips[column]) for column in STATION_ID_COLUMNS):
+        for column in STATION_ID_COLUMNS:
+            trips[column] = station_id_strings(trips[column])
+    trips['month'] = pd.Categorical(trips['month'], categories = sorted(trips['month'].unique()), ordered = True)
+    return trips
+
+
+def write_archive(trips, root):
+    """ Write the combined trips as a Parquet dataset with one directory per month """
+    table = pa.Table.from_pandas(trips, preserve_index = False)
+    parquet.write_to_dataset(table, root, partition_cols = ['month'])
+    return root
+
+
+def read_archive(root, months=None):
+    """ Read a dataset written by write_archive, optionally only some months ('2019-02', ...) """
+    filters = [('month', 'in', list(months))] if months is not None else None
+    trips = parquet.read_table(root, filters = filters).to_pandas()
+    trips['month'] = pd.Categorical(trips['month'].astype(str), ordered = True)
+    return trips
@@ -0,0 +1,74 @@
+"""Trajectories of the bikes: chained trips, idle times and rebalancing.
+
+chain_trips() sorts the trips once by bike and start time and compares
+every trip with the previous trip of the same bike by shifting the
+sorted arrays by one row: the station the bike was left at, the time it
+stood there (idle) and whether it was picked up at another station. A
+bike that starts from a station it did not arrive at was moved by a
+rebalancing truck (or taken to the workshop) in between. The trips
+without a bike id (the Bay Wheels files from April 2020 on have none)
+are left out.
+
+rebalancing_moves() lists those moves and station_idle_times() sums up,
+per station, how long bikes wait for their next rider and how many bikes
+the trucks took away and brought in.
+"""
+import numpy as np
+import pandas as pd
+
+from .flows import time_order
+
+
+def chain_trips(trips):
+    """ Trips with a bike id in bike and start time order, each with the end of the previous trip of its bike
+
+    Adds previous_station_id (where the previous trip ended), idle (the time
+    since it ended, NaT for the first trip of a bike) and rebalanced (True
+    when the trip starts at another station than the previous one ended).
+    The index is the index of trips.
+    """
+    known = trips['bike_id'].notna().to_numpy()
+    rows = np.flatnonzero(known)
+    bikes, _ = pd.factorize(trips['bike_id'].to_numpy()[rows], sort = True)
+    order = rows[time_order(bikes, trips['start_time'].to_numpy(dtype = 'datetime64[us]')[rows])]
+    chains = trips[['bike_id', 'start_time', 'end_time', 'start_station_id', 'end_station_id']].take(order)
+
+    # the previous row is the previous trip of the same bike unless the bike changes
+    bike = chains['bike_id'].to_numpy(dtype = np.int64)
+    same = np.concatenate([[False], bike[1:] == bike[:-1]])
+    chains['previous_station_id'] = chains['end_station_id'].shift(1).where(same)
+    chains['idle'] = (chains['start_time'] - chains['end_time'].shift(1)).where(same)
+    # station codes shared by both columns, -1 for a missing station
+    ids = pd.concat([chains['start_station_id'], chains['end_station_id']], ignore_index = True)
+    codes, _ = pd.factorize(ids)
+    start, end = codes[:len(chains)], codes[len(chains):]
+    previous = np.concatenate([[-1], end[:-1]])
+    chains['rebalanced'] = same & (start >= 0) & (previous >= 0) & (start != previous)
+    return chains
+
+
+def rebalancing_moves(chains):
+    """ One row per bike picked up at another station than it was left at, from chain_trips() """
+    moved = chains[chains['rebalanced']]
+    return pd.DataFrame({'bike_id': moved['bike_id'],
+                         'from_station_id': moved['previous_station_id'],
+                         'to_station_id': moved['start_station_id'],
+                         'left': moved['start_time'] - moved['idle'],
+                         'picked_up': moved['start_time'],
+                         'idle': moved['idle']})
+
+
+def station_idle_times(chains):
+    """ Per station: bikes waiting there for their next trip, their median and mean idle time
+    in hours, and the bikes the trucks took away from (moved_out) and brought to (moved_in) it """
+    waiting = chains[~chains['rebalanced'] & chains['idle'].notna()]
+    hours = waiting['idle'].dt.total_seconds() / 3600
+    idle = hours.groupby(waiting['start_station_id']).agg(['count', 'median', 'mean'])
+    idle.columns = ['waits', 'median_idle_hours', 'mean_idle_hours']
+    moves = rebalancing_moves(chains)
+    stations = pd.concat([idle, moves['from_station_id'].value_counts().rename('moved_out'),
+                          moves['to_station_id'].value_counts().rename('moved_in')], axis = 1)
+    counts = ['waits', 'moved_out', 'moved_in']
+    stations[counts] = stations[counts].fillna(0).astype('int64')
+    stations.index.name = 'station_id'
+    return stations.sort_index()
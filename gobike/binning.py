@@ -0,0 +1,85 @@
+"""Histogram counts over shared bin edges.
+
+The duration and age figures of Part1 draw histograms of the whole data
+and of the top 10 stations, on linear bins and on bins that are evenly
+spaced in log10. Histograms.from_trips() computes the counts of every
+station once for a given set of Bins; the histogram of any group of
+stations is then the sum of their rows and is drawn with
+plotting.hist_barplot() without touching the trip rows again.
+"""
+import numpy as np
+import pandas as pd
+
+
+class Bins:
+    """ Evenly spaced bin edges, np.arange(start, stop, step), in log10 when log is True
+
+    Bins(0.008, 3.25, 0.05, log = True) are the edges 10 ** np.arange(0.008, 3.25, 0.05).
+    """
+
+    def __init__(self, start, stop, step, log=False):
+        self.start, self.stop, self.step, self.log = start, stop, step, log
+        self.edges = np.arange(start, stop, step)
+        if log:
+            self.edges = 10 ** self.edges
+
+    def __len__(self):
+        return len(self.edges) - 1
+
+    def __repr__(self):
+        return 'Bins({}, {}, {}, log = {})'.format(self.start, self.stop, self.step, self.log)
+
+    def index(self, values):
+        """ Bin number of every value, -1 outside the edges (the last bin includes its right edge) """
+        values = np.asarray(values, dtype = np.float64)
+        edges = self.edges
+        inside = (values >= edges[0]) & (values <= edges[-1])
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            scaled = np.log10(values) if self.log else values
+            guess = np.floor((scaled - self.start) / self.step)
+        guess = np.clip(np.nan_to_num(guess), 0, len(self) - 1).astype(np.int64)
+        # the arithmetic can be off by one next to an edge, check against the real edges
+        guess -= values < edges[guess]
+        guess += (guess < len(self) - 1) & (values >= edges[np.minimum(guess + 1, len(self))])
+        return np.where(inside, guess, -1)
+
+    def counts(self, values):
+        """ Histogram counts of values, the same as np.histogram(values, self.edges)[0] """
+        index = self.index(values)
+        return np.bincount(index[index >= 0], minlength = len(self))
+
+
+def linear_bins(start, maximum, step):
+    """ Bins from start to past maximum, like np.arange(start, maximum + step, step) """
+    return Bins(start, maximum + step, step)
+
+
+# log bins of the duration and age figures
+DURATION_LOG_BINS = Bins(0.008, 3.2 + 0.05, 0.05, log = True)
+AGE_LOG_BINS = Bins(1.2, 2.2 + 0.02, 0.02, log = True)
+
+
+class Histograms:
+    """ Histogram counts of one variable per group (station by default) over shared Bins """
+
+    def __init__(self, bins, groups, counts):
+        self.bins = bins
+        self.groups = groups
+        self.table = counts
+
+    @classmethod
+    def from_trips(cls, trips, variable, bins, by='start_station_id'):
+        """ Count trips per group of by and bin of variable in one pass """
+        codes, groups = pd.factorize(trips[by], sort = True)
+        index = bins.index(trips[variable].to_numpy(dtype = np.float64, na_value = np.nan))
+        keep = (index >= 0) & (codes >= 0)
+        cell = codes[keep] * len(bins) + index[keep]
+        counts = np.bincount(cell, minlength = len(groups) * len(bins)).reshape(len(groups), len(bins))
+        return cls(bins, pd.Index(groups, name = by), counts)
+
+    def counts(self, groups=None):
+        """ Histogram counts of all trips, or of the trips of the given groups only """
+        if groups is None:
+            return self.table.sum(axis = 0)
+        positions = self.groups.get_indexer(pd.Index(groups))
+        return self.table[positions[positions >= 0]].sum(axis = 0)
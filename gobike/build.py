@@ -0,0 +1,202 @@
+"""Incremental build of the slide deck.
+
+The deck is the last node of a small graph:
+
+    raw csv -> cleaned trips -> top stations -> top-station trips
+            -> cube, age and duration sketches, bitmaps -> each figure -> deck
+
+Every node has a fingerprint, the hash of the fingerprints of its inputs
+and of the code that computes it (the version of the cleaning pipeline,
+the source of top_n_stations, of the aggregate modules and of a figure
+spec with the gobike functions each of them calls, the markdown of the
+deck). The outputs
+are stored under names holding their fingerprint: the Feather cache of
+the cleaned trips, a pickle per aggregate, an image per figure in
+<cache_dir>/figures, and the fingerprint inside the deck file. A node is
+rebuilt only when no output with its current fingerprint exists, so
+editing the title of one slide redraws that figure and rewrites the
+deck, and everything else is read back from the cache.
+"""
+import glob
+import hashlib
+import importlib
+import inspect
+import os
+import shutil
+import tempfile
+import types
+
+from .cache import CACHE_DIR, HAS_ARROW, PIPELINE_VERSION, cache_path, file_hash
+from .figures import FIGURE_USES, FIGURES, FigureData, _import_figures, render_figures
+from .ingest import DATA_FILE
+from .report import DECK_SCRIPT, deck_cells, deck_file, deck_fingerprint, write_deck
+from .stations import top_n_stations
+
+# aggregates stored as pickles: module whose code they depend on
+AGGREGATES = {'bitmaps': 'gobike.bitmaps', 'cube': 'gobike.cube', 'age_sketch': 'gobike.sketches', 'duration_sketch': 'gobike.sketches'}
+
+
+def digest(*parts):
+    """ Short hex hash of the str of parts """
+    hashed = hashlib.blake2b(digest_size = 8)
+    for part in parts:
+        hashed.update(str(part).encode())
+        hashed.update(b'\0')
+    return hashed.hexdigest()
+
+
+def code_fingerprint(*functions):
+    """ Hash of the source of functions and of the gobike functions they call, recursively """
+    sources, seen, pending = [], set(), list(functions)
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        sources.append(inspect.getsource(current))
+        for code in _codes(current.__code__):
+            for name in code.co_names:
+                called = current.__globals__.get(name)
+                if isinstance(called, types.FunctionType) and called.__module__.startswith('gobike'):
+                    pending.append(called)
+    return digest(*sources)
+
+
+def module_fingerprint(name):
+    """ Hash of the source of the module name and of the gobike functions its functions and methods call """
+    module = importlib.import_module(name)
+    functions = []
+    for value in vars(module).values():
+        if getattr(value, '__module__', None) != name:
+            continue
+        if isinstance(value, types.FunctionType):
+            functions.append(value)
+        elif isinstance(value, type):
+            # methods, classmethods and staticmethods
+            functions += [getattr(member, '__func__', member) for member in vars(value).values()
+                          if isinstance(getattr(member, '__func__', member), types.FunctionType)]
+    return digest(inspect.getsource(module), code_fingerprint(*functions))
+
+
+def _codes(code):
+    """ code and the code objects nested in it (lambdas, comprehensions) """
+    yield code
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            yield from _codes(constant)
+
+
+class DeckBuild:
+    """ Build graph of the deck of script, drawn from the trips of path """
+
+    def __init__(self, path=DATA_FILE, script=DECK_SCRIPT, cache_dir=CACHE_DIR, n=10, fmt='png', target=None):
+        _import_figures()
+        self.path = path
+        self.script = script
+        self.cache_dir = cache_dir
+        self.n = n
+        self.fmt = fmt
+        self.target = target or deck_file(script)
+        self.cells = deck_cells(script)
+        self.figures = [name for _, names in self.cells for name in names]
+        unknown = [name for name in self.figures if name not in FIGURES]
+        if unknown:
+            raise KeyError('no figure named {}'.format(unknown))
+        self._fingerprints = {}
+
+    def __repr__(self):
+        return 'DeckBuild({!r}, {} figures)'.format(self.script, len(self.figures))
+
+    def nodes(self):
+        """ Names of the nodes, inputs first """
+        return (['raw', 'clean', 'top', 'gobike10'] + list(AGGREGATES) +
+                ['figure:' + name for name in self.figures] + ['deck'])
+
+    def fingerprint(self, node):
+        """ Fingerprint of node, from its inputs and code """
+        if node not in self._fingerprints:
+            self._fingerprints[node] = self._fingerprint(node)
+        return self._fingerprints[node]
+
+    def _fingerprint(self, node):
+        if node == 'raw':
+            return file_hash(self.path, cache_dir = self.cache_dir)
+        if node == 'clean':
+            return digest(self.fingerprint('raw'), PIPELINE_VERSION)
+        if node == 'top':
+            return digest(self.fingerprint('clean'), self.n, code_fingerprint(top_n_stations))
+        if node == 'gobike10':
+            return digest(self.fingerprint('top'), inspect.getsource(FigureData.gobike10.func))
+        if node in AGGREGATES:
+            return digest(self.fingerprint('gobike10'), node, module_fingerprint(AGGREGATES[node]))
+        if node.startswith('figure:'):
+            name = node[len('figure:'):]
+            return digest(*[self.fingerprint(used) for used in FIGURE_USES[name]],
+                          code_fingerprint(FIGURES[name]), inspect.getsource(FigureData), self.fmt)
+        if node == 'deck':
+            return digest(*[self.fingerprint('figure:' + name) for name in self.figures],
+                          self.cells, inspect.getsource(importlib.import_module('gobike.report')))
+        raise KeyError('no node named {}'.format(node))
+
+    def output(self, node):
+        """ File holding the result of node with its current fingerprint (None if it is not stored) """
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        if node == 'clean':
+            return cache_path(self.path, self.cache_dir) if HAS_ARROW else None
+        if node in AGGREGATES:
+            return os.path.join(self.cache_dir, '{}-{}-{}.pickle'.format(stem, node, self.fingerprint(node)))
+        if node.startswith('figure:'):
+            name = node[len('figure:'):]
+            return os.path.join(self.cache_dir, 'figures', '{}-{}.{}'.format(name, self.fingerprint(node), self.fmt))
+        if node == 'deck':
+            return self.target
+        return None
+
+    def is_current(self, node):
+        """ Whether the stored output of node has its current fingerprint """
+        if node == 'deck':
+            return deck_fingerprint(self.target) == self.fingerprint('deck')
+        target = self.output(node)
+        return target is not None and os.path.exists(target)
+
+    def stale(self):
+        """ Stored nodes that have to be rebuilt """
+        return [node for node in self.nodes() if self.output(node) is not None and not self.is_current(node)]
+
+    def run(self, processes=None):
+        """ Rebuild the stale nodes and return {node: 'built', 'cached' or 'skipped'} of the stored nodes
+
+        The stale figures are drawn with render_figures() on processes;
+        the aggregates they need are built once, before the pool starts.
+        Stale nodes nothing needed in this run (e.g. the cleaned data when
+        no figure is redrawn) are reported as skipped.
+        """
+        stale = self.stale()
+        redraw = [node[len('figure:'):] for node in stale if node.startswith('figure:')]
+        data = FigureData(self.path, self.cache_dir, self.n,
+                          aggregate_files = {node: self.output(node) for node in AGGREGATES})
+        if redraw:
+            os.makedirs(os.path.join(self.cache_dir, 'figures'), exist_ok = True)
+            for node in AGGREGATES:
+                if node in stale and any(node in FIGURE_USES[name] for name in redraw):
+                    getattr(data, node)
+                    _prune(self.output(node))
+            with tempfile.TemporaryDirectory() as out_dir:
+                rendered = render_figures(redraw, data, out_dir, self.fmt, processes)
+                for name, (image, _) in rendered.items():
+                    shutil.move(image, self.output('figure:' + name))
+                    _prune(self.output('figure:' + name))
+        if 'deck' in stale:
+            images = {name: self.output('figure:' + name) for name in self.figures}
+            write_deck(self.cells, images, self.target, self.fmt, self.fingerprint('deck'))
+        # built only when the output exists now, stale inputs no figure read are left for a later build
+        return {node: ('built' if self.is_current(node) else 'skipped') if node in stale else 'cached'
+                for node in self.nodes() if self.output(node) is not None}
+
+
+def _prune(target):
+    """ Remove the files of older fingerprints of the node stored in target (<name>-<fingerprint>.<ext>) """
+    name, extension = os.path.basename(target).rsplit('-', 1)[0], os.path.splitext(target)[1]
+    for old in glob.glob(os.path.join(glob.escape(os.path.dirname(target)), '{}-*{}'.format(glob.escape(name), extension))):
+        if old != target and os.path.basename(old)[len(name) + 1:-len(extension)].isalnum():
+            os.remove(old)
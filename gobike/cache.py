@@ -0,0 +1,208 @@
+"""On-disk cache of the cleaned trip data.
+
+The cleaned frame is written as an uncompressed Feather (Arrow IPC) file
+whose name holds the content hash of the source csv and the cleaning
+PIPELINE_VERSION. Later runs memory-map that file instead of loading and
+cleaning the csv again; when either the csv or the pipeline changes the
+name no longer matches and the cache is rebuilt.
+
+Caching needs pyarrow. Without it cached_trips() simply cleans the csv.
+
+This module only imports pandas and pyarrow when a cache file is written
+or read, so the top stations of a cached csv are answered from their json
+file without loading either (see python -m gobike top). The content hash
+of every csv is also kept in <cache_dir>/hashes.json by size and
+modification time, instead of reading the whole csv again in every new
+process.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+
+DATA_FILE = '201902-fordgobike-tripdata.csv'
+
+CACHE_DIR = '.gobike_cache'
+
+# bump when the output of gobike.cleaning.clean_trips or the layout of the cache file changes,
+# this invalidates the on-disk caches
+PIPELINE_VERSION = 5
+
+# pyarrow.feather is imported when a cache file is first written or read
+HAS_ARROW = importlib.util.find_spec('pyarrow') is not None
+
+# file_hash results of this process, keyed by path, size and modification time
+_hashes = {}
+
+
+def file_hash(path, block_size=1 << 20, cache_dir=None):
+    """ Hex digest of the content of a file, remembered in <cache_dir>/hashes.json when given """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        index = os.path.join(cache_dir, 'hashes.json') if cache_dir else None
+        stored = _read_json(index) if index else {}
+        if stored.get(key[0], [None, None])[:2] == [stat.st_size, stat.st_mtime_ns]:
+            _hashes[key] = stored[key[0]][2]
+        else:
+            _hashes[key] = _hash_content(path, block_size)
+            if index:
+                stored[key[0]] = [stat.st_size, stat.st_mtime_ns, _hashes[key]]
+                _write_json(stored, index)
+    return _hashes[key]
+
+
+def _read_json(target):
+    if not os.path.exists(target):
+        return {}
+    with open(target) as stored:
+        return json.load(stored)
+
+
+def _write_json(content, target):
+    folder = os.path.dirname(target) or '.'
+    os.makedirs(folder, exist_ok = True)
+    # a temporary file of its own per writer, processes cleaning other months
+    # write the same hashes.json; the last one wins, the others only rehash later
+    handle, partial = tempfile.mkstemp(dir = folder, prefix = os.path.basename(target) + '.', suffix = '.partial')
+    try:
+        with os.fdopen(handle, 'w') as stored:
+            json.dump(content, stored)
+        # mkstemp creates the file for its owner only, give it the mode of the cache files next to it
+        os.chmod(partial, 0o666 & ~_umask())
+        os.replace(partial, target)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def _umask():
+    # os.umask can only be read by setting it
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def _hash_content(path, block_size):
+    digest = hashlib.blake2b(digest_size = 16)
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path, cache_dir=CACHE_DIR):
+    """ Cache file of the cleaned data for the current content of path """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = '{}-{}-v{}.feather'.format(stem, file_hash(path, cache_dir = cache_dir), PIPELINE_VERSION)
+    return os.path.join(cache_dir, name)
+
+
+def cached_trips(path=DATA_FILE, cache_dir=CACHE_DIR):
+    """ Return the cleaned trip data of path, from the cache when it is up to date """
+    from .cleaning import clean_trips
+    if not HAS_ARROW:
+        return clean_trips(path)
+    target = cache_path(path, cache_dir)
+    if not os.path.exists(target):
+        write_cache(clean_trips(path), target)
+    return read_cache(target)
+
+
+def cached_top_stations(path=DATA_FILE, n=10, by='start_station_id', cache_dir=CACHE_DIR):
+    """ top_n_stations of the cleaned data of path, kept next to its cache file
+
+    The station ids are stored in a small json file per cache file, so they
+    belong to the same csv content and pipeline version, under a key that
+    holds the hash of the source of gobike.stations.
+    """
+    def top():
+        from .stations import top_n_stations
+        return [_plain(station) for station in top_n_stations(cached_trips(path, cache_dir), n, by)]
+    return _cached_summary(path, '{}:{}:{}'.format(by, n, _source_hash('gobike.stations')), top, cache_dir)
+
+
+def cached_top_table(path=DATA_FILE, n=10, by='start_station_id', cache_dir=CACHE_DIR):
+    """ [station id, station name, trips] of the n stations with the most trips in column by, busiest first
+
+    Kept in the same json file as cached_top_stations.
+    """
+    def table():
+        from .stations import station_table
+        column = 'start_trips' if by == 'start_station_id' else 'end_trips'
+        stations = station_table(cached_trips(path, cache_dir))
+        ids = cached_top_stations(path, n, by, cache_dir)
+        return [[station, stations.loc[station, 'station_name'], _plain(stations.loc[station, column])]
+                for station in ids]
+    return _cached_summary(path, 'table:{}:{}:{}'.format(by, n, _source_hash('gobike.stations')), table, cache_dir)
+
+
+def cached_station_coordinates(path=DATA_FILE, cache_dir=CACHE_DIR):
+    """ read_station_coordinates of path, kept in the same json file as cached_top_stations """
+    import pandas as pd
+
+    def coordinates():
+        from .spatial import read_station_coordinates
+        return [[_plain(station), float(latitude), float(longitude)]
+                for station, latitude, longitude in read_station_coordinates(path).itertuples()]
+    rows = _cached_summary(path, 'coordinates', coordinates, cache_dir)
+    return pd.DataFrame([row[1:] for row in rows], columns = ['latitude', 'longitude'],
+                        index = pd.Index([row[0] for row in rows], name = 'station_id'))
+
+
+def _cached_summary(path, key, compute, cache_dir):
+    """ Value of key in the json file of the cache of path, computed and stored when missing """
+    summary = cache_path(path, cache_dir) + '.stations.json'
+    tops = _read_json(summary)
+    if key not in tops:
+        value = compute()
+        # compute may have stored other keys meanwhile
+        tops = _read_json(summary)
+        tops[key] = value
+        _write_json(tops, summary)
+    return tops[key]
+
+
+def _source_hash(module):
+    """ Hash of the source file of module, found without importing it """
+    return file_hash(importlib.util.find_spec(module).origin)
+
+
+def _plain(value):
+    # numpy integers are not json serializable
+    return value.item() if hasattr(value, 'item') else value
+
+
+def read_cache(target, columns=None):
+    """ Memory-map a cache file into a dataframe, only the columns in columns when given
+
+    The file holds one uncompressed record batch, so every column without
+    a validity mask (durations, times, ages, the codes of the categories)
+    and the station names stay views of the mapped file instead of being
+    copied: those columns are read-only, copy() the frame before setting
+    values in place. Only the nullable id columns are converted.
+    """
+    from pyarrow import feather
+    table = feather.read_table(target, columns = columns, memory_map = True)
+    return table.to_pandas(split_blocks = True, self_destruct = True)
+
+
+def write_cache(clean_gobike, target):
+    """ Write the cleaned data to target and remove older caches of the same csv """
+    cache_dir, name = os.path.split(target)
+    os.makedirs(cache_dir or '.', exist_ok = True)
+    import pyarrow as pa
+    from pyarrow import feather
+    # one record batch of contiguous columns, read_cache() maps them without copying
+    table = pa.Table.from_pandas(clean_gobike).combine_chunks()
+    # write to a temporary name first so an interrupted run leaves no broken cache
+    partial = target + '.partial'
+    feather.write_feather(table, partial, compression = 'uncompressed', chunksize = max(table.num_rows, 1))
+    os.replace(partial, target)
+
+    stem = name.rsplit('-', 2)[0]
+    for old in os.listdir(cache_dir or '.'):
+        if not old.startswith(name) and old.endswith(('.feather', '.json')) and old.rsplit('-', 2)[0] == stem:
+            os.remove(os.path.join(cache_dir, old))
@@ -0,0 +1,125 @@
+"""Cleaning pipeline for the Ford GoBike trip data.
+
+The steps follow the "Cleaning Data" section of Part1 and give the 174952
+rows and 14 columns frame used by both parts. Rather than copying the raw
+frame, adding columns to it and dropping most of them again, clean_trips()
+first finds the rows without missing data and then builds each of the 14
+output columns once, for those rows only.
+"""
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from .ingest import COLUMNS, DATA_FILE, read_trips
+
+# clean_trips() gives the age of riders in the year of their trip; rider_age()
+# without a year gives the age in 2019, the year of the February 2019 file
+DATA_YEAR = 2019
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_PERIODS = ['morning', 'afternoon', 'night']
+
+DAY_TYPE = pd.api.types.CategoricalDtype(ordered = True, categories = DAYS)
+DAY_PERIOD_TYPE = pd.api.types.CategoricalDtype(ordered = True, categories = DAY_PERIODS)
+
+# DAY_PERIODS code of each hour of the day
+PERIOD_OF_HOUR = np.array([0] * 12 + [1] * 6 + [2] * 6, dtype = np.int8)
+
+MONTH_ABBR = np.array(calendar.month_abbr)
+
+
+def rider_age(birth_year, year=DATA_YEAR):
+    """ Age of riders in year (a number or a series, e.g. the years of the trips) from their year of birth """
+    return year - birth_year
+
+
+def month_abbr(times):
+    """ Abbreviated month name (Jan, Feb, ...) of a datetime series """
+    return pd.Series(MONTH_ABBR[times.dt.month.to_numpy()], index = times.index)
+
+
+def hour(times):
+    """ Hour of the day of a datetime series """
+    return times.dt.hour
+
+
+def weekday(times):
+    """ Day of the week of a datetime series as an ordered categorical (DAYS) """
+    codes = times.dt.dayofweek.to_numpy().astype(np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, dtype = DAY_TYPE), index = times.index)
+
+
+def day_period(hours):
+    """ Time of the day of an hour series as an ordered categorical (DAY_PERIODS)
+
+    morning is 0-11, afternoon 12-17 and night 18-23.
+    """
+    codes = PERIOD_OF_HOUR[hours.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, dtype = DAY_PERIOD_TYPE), index = hours.index)
+
+
+def id_integers(ids):
+    """ Station or bike ids as nullable 32 bit integers
+
+    Station ids that are not numbers (e.g. 'SF-G27' in later archive months)
+    are kept as they are.
+    """
+    if pd.api.types.is_numeric_dtype(ids):
+        return ids.astype('Int32')
+    return ids
+
+
+# bump PIPELINE_VERSION (in gobike.cache, read without pandas) when the output of clean_trips changes
+def clean_trips(gobike=DATA_FILE, missing=None):
+    """ Return the cleaned trip data (clean_gobike)
+
+    gobike is either the raw dataframe or the path of the csv file to load
+    with read_trips(). The raw dataframe is left untouched. missing lists the
+    columns the file does not record (the member data of later archive
+    months), by default those harmonize() added; it comes from the header of
+    the file, so every chunk of a file is cleaned like the whole file.
+    """
+    if not isinstance(gobike, pd.DataFrame):
+        gobike = read_trips(gobike)
+    if missing is None:
+        missing = gobike.attrs.get('missing_columns', [])
+
+    # rows with missing data are dropped, the columns the file does not record
+    # are not counted as missing data
+    recorded = [column for column in COLUMNS if column not in missing]
+    keep = gobike[recorded].notna().all(axis = 1)
+    if keep.all():
+        def column(name):
+            return gobike[name]
+    else:
+        def column(name):
+            return gobike[name][keep]
+
+    # convert start_time and end_time variable to datetime
+    start_time = pd.to_datetime(column('start_time'))
+    end_time = pd.to_datetime(column('end_time'))
+
+    # create the age of riders in the year of the trip
+    age = rider_age(column('member_birth_year'), start_time.dt.year)
+
+    clean_gobike = pd.DataFrame({
+        # duration in minutes, rounded to 2 decimal points
+        'duration_mins': round(column('duration_sec') / 60, 2),
+        # start_day, end_day and time of the day as ordered variables, built
+        # from their int8 codes without going through the day and period names
+        'start_time': start_time,
+        'start_day': weekday(start_time),
+        'end_time': end_time,
+        'end_day': weekday(end_time),
+        'start_station_id': id_integers(column('start_station_id')),
+        'start_station_name': column('start_station_name'),
+        'end_station_id': id_integers(column('end_station_id')),
+        'end_station_name': column('end_station_name'),
+        'bike_id': id_integers(column('bike_id')),
+        'user_type': column('user_type'),
+        'member_gender': column('member_gender'),
+        'age': age.astype(int if 'member_birth_year' in recorded else 'Int64'),
+        'day_period': day_period(hour(start_time)),
+    })
+    return clean_gobike
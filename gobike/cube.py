@@ -0,0 +1,172 @@
+"""Pre-aggregated trip counts and measures.
+
+TripCube keeps, for every combination of start station, start day, time of
+the day, user type and gender, the number of trips and the sums, sums of
+squares, minimum and maximum of duration_mins and age, in dense NumPy
+arrays with one axis per dimension. The station/day heatmaps and the
+countplots of both parts only need sums over some of the axes of these
+arrays, so they are answered without going back to the trip rows.
+"""
+import numpy as np
+import pandas as pd
+
+from .stations import station_table
+
+
+CUBE_DIMENSIONS = ['start_station_id', 'start_day', 'day_period', 'user_type', 'member_gender']
+CUBE_VARIABLES = ['duration_mins', 'age']
+
+# dimensions that can be used in place of another one, with other labels
+ALIASES = {'start_station_name': 'start_station_id'}
+
+
+def _axis(values):
+    """ (labels, codes) of a dimension column, missing values get the last label """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        labels = pd.CategoricalIndex(values.cat.categories, dtype = values.dtype)
+        codes = values.cat.codes.to_numpy().astype(np.int64)
+    else:
+        codes, labels = pd.factorize(values, sort = True)
+        labels = pd.Index(labels)
+    if (codes < 0).any():
+        codes[codes < 0] = len(labels)
+        labels = labels.append(pd.Index([np.nan]))
+    return labels, codes
+
+
+class TripCube:
+    """ Dense cube of trip measures over CUBE_DIMENSIONS
+
+    Build it with TripCube.from_trips(trips). The measures are 'count' and,
+    for each of CUBE_VARIABLES, '<variable>_sum', '<variable>_sumsq',
+    '<variable>_min' and '<variable>_max'.
+    """
+
+    def __init__(self, labels, measures, names=None):
+        self.labels = labels
+        self.measures = measures
+        self.names = names if names is not None else {}
+        self.dimensions = list(labels)
+        # label -> position of every dimension and alias, for the filters
+        self._positions = {dimension: {label: position for position, label in enumerate(self._labels(dimension))}
+                           for dimension in self.dimensions + list(self.names)}
+
+    @classmethod
+    def from_trips(cls, trips, dimensions=CUBE_DIMENSIONS, variables=CUBE_VARIABLES):
+        """ Aggregate the trip rows into a cube """
+        labels, codes = {}, []
+        for dimension in dimensions:
+            labels[dimension], axis_codes = _axis(trips[dimension])
+            codes.append(axis_codes)
+        shape = tuple(len(labels[dimension]) for dimension in dimensions)
+        cell = np.ravel_multi_index(codes, shape) if len(trips) else np.zeros(0, dtype = np.int64)
+        size = int(np.prod(shape))
+
+        measures = {'count': np.bincount(cell, minlength = size).reshape(shape)}
+        for variable in variables:
+            values = trips[variable].to_numpy(dtype = np.float64, na_value = np.nan)
+            measures[variable + '_sum'] = np.bincount(cell, weights = values, minlength = size).reshape(shape)
+            measures[variable + '_sumsq'] = np.bincount(cell, weights = values ** 2, minlength = size).reshape(shape)
+            extremes = pd.Series(values).groupby(cell).agg(['min', 'max'])
+            for stat, empty in [('min', np.inf), ('max', -np.inf)]:
+                flat = np.full(size, empty)
+                flat[extremes.index.to_numpy()] = extremes[stat].to_numpy()
+                measures['{}_{}'.format(variable, stat)] = flat.reshape(shape)
+
+        names = {}
+        if 'start_station_id' in dimensions:
+            stations = station_table(trips)['station_name']
+            names['start_station_name'] = stations.reindex(labels['start_station_id']).to_numpy()
+        return cls(labels, measures, names)
+
+    def _axis_number(self, dimension):
+        return self.dimensions.index(ALIASES.get(dimension, dimension))
+
+    def _labels(self, dimension):
+        if dimension in self.names:
+            return pd.Index(self.names[dimension], name = dimension)
+        return pd.Index(self.labels[dimension], name = dimension)
+
+    def _select(self, array, filters):
+        """ array restricted to the cells matching filters (dimension=value or list of values) """
+        for dimension, wanted in filters.items():
+            axis = self._axis_number(dimension)
+            wanted = [wanted] if np.ndim(wanted) == 0 else list(wanted)
+            positions = self._positions[dimension]
+            missing = [value for value in wanted if value not in positions]
+            if missing:
+                raise KeyError('{} has no {}'.format(dimension, missing))
+            array = np.take(array, [positions[value] for value in wanted], axis = axis)
+        return array
+
+    def _reduce(self, measure, by, filters):
+        """ measure summed (or min/max-ed) over every dimension not in by, axes in the order of by """
+        array = self._select(self.measures[measure], filters)
+        keep = [self._axis_number(dimension) for dimension in by]
+        others = tuple(axis for axis in range(array.ndim) if axis not in keep)
+        if measure.endswith('_min'):
+            array = array.min(axis = others)
+        elif measure.endswith('_max'):
+            array = array.max(axis = others)
+        else:
+            array = array.sum(axis = others)
+        # remaining axes are in cube order, put them in the order of by
+        order = sorted(keep)
+        return np.transpose(array, [order.index(axis) for axis in keep])
+
+    def values(self, measure, by=(), **filters):
+        """ A measure aggregated per combination of the dimensions in by, as a NumPy array
+
+        This is the fastest lookup; its axes follow by and the labels of each
+        axis are in self.labels (or self.names for station names).
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        return self._reduce(measure, by, filters)
+
+    def count(self, by=(), **filters):
+        """ Number of trips per combination of the dimensions in by, as a Series
+
+        With no dimension the total number of trips is returned.
+        """
+        return self.measure('count', by, **filters)
+
+    def measure(self, measure, by=(), **filters):
+        """ A measure aggregated per combination of the dimensions in by, as a Series """
+        by = [by] if isinstance(by, str) else list(by)
+        array = self._reduce(measure, by, filters)
+        if not by:
+            return array.item()
+        index = pd.MultiIndex.from_product([self._labels(dimension) for dimension in by])
+        if len(by) == 1:
+            index = index.get_level_values(0)
+        return pd.Series(array.ravel(), index = index, name = measure)
+
+    def table(self, rows, columns, measure='count', **filters):
+        """ A measure as a rows x columns dataframe, like a groupby(...).size() pivot
+
+        Combinations without trips are NaN, as in the pivot of a groupby.
+        """
+        array = self._reduce(measure, [rows, columns], filters).astype(float)
+        counts = self._reduce('count', [rows, columns], filters)
+        array[counts == 0] = np.nan
+        frame = pd.DataFrame(array, index = self._labels(rows), columns = self._labels(columns))
+        # drop rows and columns without trips, like a groupby would
+        frame = frame.loc[counts.sum(axis = 1) > 0, counts.sum(axis = 0) > 0]
+        if rows in self.names:
+            frame = frame.sort_index()
+        return frame
+
+    def stats(self, variable, by=(), **filters):
+        """ count, mean, std, min and max of a variable per combination of the dimensions in by """
+        count = self.measure('count', by, **filters)
+        total = self.measure(variable + '_sum', by, **filters)
+        squares = self.measure(variable + '_sumsq', by, **filters)
+        mean = total / count
+        # sample variance, like pandas describe()
+        variance = (squares - count * mean ** 2) / (count - 1)
+        summary = {'count': count, 'mean': mean, 'std': np.sqrt(np.maximum(variance, 0)),
+                   'min': self.measure(variable + '_min', by, **filters),
+                   'max': self.measure(variable + '_max', by, **filters)}
+        if np.ndim(count) == 0:
+            return pd.Series(summary, name = variable)
+        return pd.DataFrame(summary)
@@ -0,0 +1,199 @@
+"""Registry of figures and a parallel renderer.
+
+A figure spec is a function of a FigureData that draws one figure with
+pyplot, registered under a name with the figure() decorator (the slides
+of Part2 are registered in gobike.slides). The figures only read the
+cleaned trips and the aggregates built from them, so render_figures()
+draws them independently on a pool of processes and saves them as PNG
+or SVG files.
+
+The parent process builds the top stations and the aggregates the
+figures use (cube, sketches, bitmaps) once, before the pool starts, and
+only those are sent to the workers: no worker reads the cleaned trips or
+builds an aggregate again, so the work of a worker is drawing. Only a
+figure drawing the trips of the top stations (gobike10) itself reads
+them in its worker.
+"""
+import importlib
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+
+from .cache import CACHE_DIR, HAS_ARROW, cache_path, cached_top_stations, cached_trips, read_cache
+from .ingest import DATA_FILE
+
+# name: function drawing the figure from a FigureData
+FIGURES = {}
+
+# name: FigureData attributes the figure draws from
+FIGURE_USES = {}
+
+# modules registering figures, imported by the worker processes
+FIGURE_MODULES = ['gobike.slides']
+
+# figure spec data of the worker processes
+_data = None
+
+
+def figure(name, uses=('cube', 'age_sketch', 'duration_sketch', 'bitmaps', 'gobike10')):
+    """ Register the decorated function as the spec of the figure name, drawn from the data in uses """
+    def register(draw):
+        FIGURES[name] = draw
+        FIGURE_USES[name] = tuple(uses)
+        return draw
+    return register
+
+
+class FigureData:
+    """ Cleaned trips of path and the subsets and aggregates the figures draw, built when first used """
+
+    # attributes kept when the data is sent to the worker processes, the aggregates once built
+    _shared = ['path', 'cache_dir', 'n', 'aggregate_files', 'station', 'bitmaps', 'cube', 'age_sketch', 'duration_sketch']
+
+    def __init__(self, path=DATA_FILE, cache_dir=CACHE_DIR, n=10, aggregate_files=None):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.n = n
+        # pickle file of the cube and sketches, used by the incremental build
+        self.aggregate_files = aggregate_files or {}
+
+    def __getstate__(self):
+        return {name: self.__dict__[name] for name in self._shared if name in self.__dict__}
+
+    @cached_property
+    def cache_file(self):
+        """ Feather cache of the cleaned trips, written if needed (None without pyarrow) """
+        if not HAS_ARROW:
+            return None
+        target = cache_path(self.path, self.cache_dir)
+        if not os.path.exists(target):
+            cached_trips(self.path, self.cache_dir)
+        return target
+
+    @cached_property
+    def clean_gobike(self):
+        if self.cache_file is None:
+            return cached_trips(self.path, self.cache_dir)
+        return read_cache(self.cache_file)
+
+    @cached_property
+    def station(self):
+        """ ids of the n stations with the most trip starts """
+        return cached_top_stations(self.path, self.n, cache_dir = self.cache_dir)
+
+    @cached_property
+    def gobike10(self):
+        return self.clean_gobike.take(self.bitmaps.rows(start_station_id = self.station))
+
+    def _aggregate(self, name, build):
+        """ Aggregate name, read from its file in aggregate_files if it has one, else built (and stored) """
+        target = self.aggregate_files.get(name)
+        if target and os.path.exists(target):
+            with open(target, 'rb') as stored:
+                return pickle.load(stored)
+        aggregate = build()
+        if target:
+            with open(target + '.partial', 'wb') as stored:
+                pickle.dump(aggregate, stored, protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(target + '.partial', target)
+        return aggregate
+
+    @cached_property
+    def bitmaps(self):
+        """ BitmapIndex of the cleaned trips, with the top stations """
+        from .bitmaps import BitmapIndex
+        return self._aggregate('bitmaps', lambda: BitmapIndex.from_trips(self.clean_gobike, stations = self.station))
+
+    @cached_property
+    def cube(self):
+        from .cube import TripCube
+        return self._aggregate('cube', lambda: TripCube.from_trips(self.gobike10))
+
+    @cached_property
+    def age_sketch(self):
+        from .sketches import QuantileSketch
+        return self._aggregate('age_sketch', lambda: QuantileSketch.from_trips(self.gobike10, 'age'))
+
+    @cached_property
+    def duration_sketch(self):
+        from .sketches import QuantileSketch
+        return self._aggregate('duration_sketch', lambda: QuantileSketch.from_trips(self.gobike10, 'duration_mins'))
+
+    @cached_property
+    def ordr(self):
+        """ station names by decreasing number of trips """
+        return self.cube.count('start_station_name').sort_values(ascending = False).index
+
+    @cached_property
+    def order(self):
+        """ station ids by decreasing number of trips """
+        counts = self.bitmaps.counts('start_station_id', start_station_id = self.station)
+        return counts.sort_values(ascending = False, kind = 'stable').index
+
+    @cached_property
+    def subscribers(self):
+        """ groups of the duration sketch of subscribers """
+        return self.duration_sketch.frame().query('user_type == "Subscriber"')
+
+    @cached_property
+    def customers(self):
+        """ groups of the duration sketch of customers """
+        return self.duration_sketch.frame().query('user_type == "Customer"')
+
+    @cached_property
+    def colour(self):
+        import seaborn as sb
+        return sb.color_palette()[2]
+
+
+def render_figures(names=None, data=None, out_dir='figures', fmt='png', processes=None):
+    """ Draw the named figures (all registered figures by default) to out_dir/<name>.<fmt>
+
+    The figures are drawn on a pool of processes (os.cpu_count() by
+    default); processes=1 draws them one after the other in this process.
+    Returns {name: (file, seconds)} in the order of names.
+    """
+    _import_figures()
+    names = list(FIGURES) if names is None else list(names)
+    unknown = [name for name in names if name not in FIGURES]
+    if unknown:
+        raise KeyError('no figure named {}'.format(unknown))
+    data = FigureData() if data is None else data
+    # built once here, the workers get the station ids and aggregates with the data
+    uses = {use for name in names for use in FIGURE_USES[name]}
+    for use in ['station'] + sorted(uses.intersection(FigureData._shared)):
+        getattr(data, use)
+    os.makedirs(out_dir, exist_ok = True)
+    if processes == 1:
+        _start_worker(data)
+        rendered = [_render(name, out_dir, fmt) for name in names]
+    else:
+        with ProcessPoolExecutor(processes, initializer = _start_worker, initargs = (data,)) as pool:
+            rendered = list(pool.map(_render, names, [out_dir] * len(names), [fmt] * len(names)))
+    return {name: (target, seconds) for name, target, seconds in rendered}
+
+
+def _import_figures():
+    for module in FIGURE_MODULES:
+        importlib.import_module(module)
+
+
+def _start_worker(data):
+    global _data
+    import matplotlib
+    matplotlib.use('Agg')
+    _import_figures()
+    _data = data
+
+
+def _render(name, out_dir, fmt):
+    """ Draw one figure with the data of this process and save it """
+    import matplotlib.pyplot as plt
+    start = time.perf_counter()
+    FIGURES[name](_data)
+    target = os.path.join(out_dir, '{}.{}'.format(name, fmt))
+    plt.gcf().savefig(target, format = fmt, bbox_inches = 'tight')
+    plt.close('all')
+    return name, target, time.perf_counter() - start
@@ -0,0 +1,253 @@
+"""Departures, arrivals and bike inventory of every station over time.
+
+Every trip is a departure (-1 bike) at its start station and an arrival
+(+1) at its end station. station_events() merges both kinds of events,
+sorts them once by station and time and takes the running sum per
+station: the change of the number of bikes at the station since its
+first event, exact to the second. StationFlows counts the same events in
+time bins of any resolution (freq, one hour by default) with one
+bincount of (bin, station) keys, linear in the number of trips, and the
+cumulative sum over the bins is the level of every station. The
+inventory itself is unknown (trucks move bikes too), so occupancy()
+rescales every level to the range it covers, 0 at its lowest and 1 at
+its highest.
+
+stream_flows() counts the months of an archive in parallel and appends
+them in order to a Parquet file, carrying the level of every station and
+the arrivals of the trips that end in the next month. Only about one
+month of bins per process is in memory at once, map_months() does not
+count further ahead than that. read_flows() reads the file back.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .archive import clean_month, map_months, trip_files
+from .cache import CACHE_DIR
+from .ingest import station_id_strings
+
+try:
+    import pyarrow as pa
+    from pyarrow import parquet
+except ImportError:
+    pa = None
+
+
+FREQ = '1h'
+
+FLOW_COLUMNS = ['departures', 'arrivals', 'net_flow', 'level']
+
+
+def _events(trips):
+    """ (station codes, times, changes) of the departures then the arrivals, and the station ids """
+    ids = pd.concat([trips['start_station_id'], trips['end_station_id']], ignore_index = True)
+    codes, stations = pd.factorize(ids, sort = True)
+    times = np.concatenate([trips[column].to_numpy(dtype = 'datetime64[us]') for column in ['start_time', 'end_time']])
+    changes = np.repeat(np.array([-1, 1], dtype = np.int64), len(trips))
+    return codes, times, changes, pd.Index(stations, name = 'station_id')
+
+
+def time_order(groups, times, ties=None):
+    """ Positions sorting by groups (codes from 0), then times, then ties (booleans)
+
+    The three are combined into one integer key when it fits in 63 bits,
+    sorting it is about twice as fast as np.lexsort.
+    """
+    ties = np.zeros(len(groups), dtype = bool) if ties is None else ties
+    offsets = (times - times.min()).astype(np.int64) if len(times) else np.zeros(0, dtype = np.int64)
+    span = int(offsets.max(initial = 0)) + 1
+    if 2 * span * (int(groups.max(initial = 0)) + 1) < 2 ** 63:
+        return np.argsort((groups.astype(np.int64) * span + offsets) * 2 + ties, kind = 'stable')
+    return np.lexsort((ties, times, groups))
+
+
+def station_events(trips):
+    """ Departures (-1) and arrivals (+1) of every station in time order, with the level after each event
+
+    The level starts at 0 before the first event of each station, so minus
+    its minimum is the number of bikes the station needs to never run
+    empty without rebalancing.
+    """
+    codes, times, changes, stations = _events(trips)
+    known = codes >= 0
+    codes, times, changes = codes[known], times[known], changes[known]
+    # one sort by station and time, departures first at the same time
+    order = time_order(codes, times, changes > 0)
+    codes, times, changes = codes[order], times[order], changes[order]
+    level = np.cumsum(changes)
+    # restart the running sum at the first event of every station
+    starts = np.flatnonzero(np.diff(codes, prepend = -1))
+    level -= np.repeat(level[starts] - changes[starts], np.diff(starts, append = len(codes)))
+    return pd.DataFrame({'station_id': stations[codes], 'time': times, 'change': changes, 'level': level})
+
+
+class StationFlows:
+    """ Departures and arrivals per time bin (rows) and station (columns) """
+
+    def __init__(self, departures, arrivals, freq=FREQ, initial=None):
+        self.departures = departures
+        self.arrivals = arrivals
+        self.freq = pd.Timedelta(freq)
+        # level of every station before the first bin
+        self.initial = pd.Series(0, index = departures.columns, dtype = 'int64') if initial is None else \
+            initial.reindex(departures.columns, fill_value = 0)
+
+    @classmethod
+    def from_trips(cls, trips, freq=FREQ):
+        """ Count the departures and arrivals of trips per station and bin of freq (e.g. '15min', '1D') """
+        codes, times, _, stations = _events(trips)
+        known = codes >= 0
+        if not known.any():
+            raise ValueError('no trips with a known station')
+        step = pd.Timedelta(freq)
+        start = pd.Timestamp(times[known].min()).floor(step)
+        bins = (times - start.to_datetime64()) // step.to_timedelta64()
+        n_bins, n_stations = int(bins[known].max()) + 1, len(stations)
+        keys = bins * n_stations + codes
+        index = pd.date_range(start, periods = n_bins, freq = step, name = 'time')
+        counts = []
+        for part in (slice(None, len(trips)), slice(len(trips), None)):
+            cells = np.bincount(keys[part][known[part]], minlength = n_bins * n_stations)
+            counts.append(pd.DataFrame(cells.reshape(n_bins, n_stations), index = index, columns = stations))
+        return cls(*counts, step)
+
+    def __repr__(self):
+        return 'StationFlows({} stations, {} bins of {} from {})'.format(
+            len(self.departures.columns), len(self.departures), self.freq, self.departures.index[0])
+
+    def net_flow(self):
+        """ Arrivals minus departures per bin and station """
+        return self.arrivals - self.departures
+
+    def level(self):
+        """ Change of the number of bikes at every station at the end of every bin """
+        return self.net_flow().cumsum() + self.initial
+
+    def occupancy(self):
+        """ Level of every station relative to its range, from 0 (lowest) to 1 (highest) """
+        level = self.level()
+        low = np.minimum(level.min(), self.initial)
+        high = np.maximum(level.max(), self.initial)
+        return (level - low) / (high - low).where(high > low)
+
+    def with_string_ids(self):
+        """ The same flows with the station ids as strings """
+        def strings(index):
+            return pd.Index(station_id_strings(pd.Series(index)), name = 'station_id')
+        return StationFlows(self.departures.set_axis(strings(self.departures.columns), axis = 1),
+                            self.arrivals.set_axis(strings(self.arrivals.columns), axis = 1), self.freq,
+                            self.initial.set_axis(strings(self.initial.index)))
+
+    def merge(self, other):
+        """ Flows of the trips of both (e.g. two chunks or months), on the union of their bins and stations """
+        if other.freq != self.freq:
+            raise ValueError('cannot merge flows binned by {} and {}'.format(self.freq, other.freq))
+        flows = [self, other]
+        numeric = [pd.api.types.is_numeric_dtype(flow.departures.columns) for flow in flows]
+        if numeric[0] != numeric[1]:
+            # months with ids like 'SF-G27' keep all ids as strings, like combine()
+            flows = [flow.with_string_ids() for flow in flows]
+        stations = flows[0].departures.columns.append(flows[1].departures.columns).unique().sort_values()
+        start = min(flow.departures.index[0] for flow in flows)
+        end = max(flow.departures.index[-1] for flow in flows)
+        index = pd.date_range(start, end, freq = self.freq, name = 'time')
+        departures, arrivals = (sum(getattr(flow, name).reindex(index = index, columns = stations, fill_value = 0)
+                                    for flow in flows) for name in ['departures', 'arrivals'])
+        initial = sum(flow.initial.reindex(stations, fill_value = 0) for flow in flows)
+        return StationFlows(departures, arrivals, self.freq, initial)
+
+    def split(self, time):
+        """ (flows of the bins before time, flows of the bins from time on starting at the level reached) """
+        before = self.departures.index < time
+        initial = self.level()[before].iloc[-1] if before.any() else self.initial
+        return (StationFlows(self.departures[before], self.arrivals[before], self.freq, self.initial),
+                StationFlows(self.departures[~before], self.arrivals[~before], self.freq, initial))
+
+    def frame(self):
+        """ Long DataFrame with one row per bin and station: time, station_id and FLOW_COLUMNS """
+        wide = {'departures': self.departures, 'arrivals': self.arrivals, 'net_flow': self.net_flow(),
+                'level': self.level()}
+        times, stations = self.departures.index, self.departures.columns
+        frame = pd.DataFrame({'time': np.repeat(times.to_numpy(), len(stations)),
+                              'station_id': np.tile(stations.to_numpy(), len(times))})
+        for name in FLOW_COLUMNS:
+            frame[name] = wide[name].to_numpy().ravel()
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame, freq=FREQ):
+        """ Flows of a frame written by frame() """
+        step = pd.Timedelta(freq)
+        times = frame['time'].to_numpy(dtype = 'datetime64[us]')
+        rows = (times - times.min()) // step.to_timedelta64()
+        index = pd.date_range(times.min(), periods = rows.max() + 1, freq = step, name = 'time')
+        # categorical codes instead of looking every id up
+        ids = frame['station_id'].astype('category')
+        order = np.argsort(ids.cat.categories)
+        stations = ids.cat.categories[order].rename('station_id')
+        columns = np.argsort(order)[ids.cat.codes.to_numpy()]
+        wide = {}
+        for name in FLOW_COLUMNS:
+            values = np.zeros((len(index), len(stations)), dtype = np.int64)
+            values[rows, columns] = frame[name].to_numpy()
+            wide[name] = pd.DataFrame(values, index = index, columns = stations)
+        initial = wide['level'].iloc[0] - wide['net_flow'].iloc[0]
+        return cls(wide['departures'], wide['arrivals'], step, initial)
+
+
+def flows_month(path, freq=FREQ, cache_dir=CACHE_DIR):
+    """ StationFlows of one monthly file """
+    return StationFlows.from_trips(clean_month(path, cache_dir), freq)
+
+
+def stream_flows(source, target, freq=FREQ, processes=None, cache_dir=CACHE_DIR):
+    """ Write the flows of all monthly files in source (in time order) to the Parquet file target
+
+    The months are counted in parallel like load_archive(), at most one per
+    process ahead of the month being written. A bin is written once the
+    next month has started, with the level carried over from the bins
+    before it. The station ids are stored as strings.
+    """
+    return _write_flows(map_months(flows_month, trip_files(source), processes, freq, cache_dir), target)
+
+
+def _write_flows(months, target):
+    """ Write an iterable of monthly flows, in time order, to target """
+    partial = target + '.partial'
+    writer = None
+    pending = None
+    try:
+        for flows in months:
+            if pending is None:
+                pending = flows
+                continue
+            # nothing of the later months happens before this month started
+            done, pending = pending.merge(flows).split(flows.departures.index[0])
+            writer = _append(writer, partial, done)
+        writer = _append(writer, partial, pending)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(partial, target)
+    return target
+
+
+def _append(writer, path, flows):
+    """ Append the rows of flows to the Parquet file path, opening the writer on the first rows """
+    frame = flows.with_string_ids().frame()
+    table = pa.Table.from_pandas(frame, preserve_index = False)
+    if writer is None:
+        writer = parquet.ParquetWriter(path, table.schema)
+    writer.write_table(table.cast(writer.schema))
+    return writer
+
+
+def read_flows(target, stations=None, freq=FREQ):
+    """ StationFlows of a file written by stream_flows, optionally only some station ids """
+    filters = [('station_id', 'in', [str(station) for station in stations])] if stations is not None else None
+    frame = parquet.read_table(target, filters = filters, read_dictionary = ['station_id']).to_pandas()
+    numbers = pd.to_numeric(frame['station_id'].cat.categories, errors = 'coerce')
+    if numbers.notna().all():
+        frame['station_id'] = frame['station_id'].cat.rename_categories(numbers.astype('int64'))
+    return StationFlows.from_frame(frame, freq)
@@ -0,0 +1,171 @@
+"""Loading the Ford GoBike trip csv files.
+
+read_trips() only parses the columns the analysis keeps and declares their
+types up front, so station ids stay integers, user_type and member_gender
+are categorical and start_time/end_time are parsed while reading instead of
+being converted from strings afterwards.
+
+The pyarrow csv reader is used when pyarrow is installed. It parses the
+file in blocks of BLOCK_SIZE bytes and every record batch is converted to
+pandas as soon as it is read, so the whole file is never held as an arrow
+table next to the pandas frame.
+"""
+import pandas as pd
+
+from .cache import DATA_FILE
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# declared dtypes of the columns used by the cleaning pipeline (station names
+# keep the default string type). Station ids and birth year have missing
+# values, so they use the nullable integer types
+SCHEMA = {
+    'duration_sec': 'int32',
+    'start_station_id': 'Int32',
+    'end_station_id': 'Int32',
+    'bike_id': 'int32',
+    'user_type': 'category',
+    'member_birth_year': 'Int16',
+    'member_gender': 'category',
+}
+TIME_COLUMNS = ['start_time', 'end_time']
+COLUMNS = ['duration_sec', 'start_time', 'end_time', 'start_station_id', 'start_station_name',
+           'end_station_id', 'end_station_name', 'bike_id', 'user_type', 'member_birth_year',
+           'member_gender']
+ENGINE = 'pyarrow' if pa is not None else 'c'
+
+# bytes of csv parsed per pyarrow record batch
+BLOCK_SIZE = 4 << 20
+
+# the Bay Wheels files from April 2020 on use new column names; map them to the
+# Ford GoBike names. Those files have no duration_sec, bike_id or member data
+RENAMED_COLUMNS = {
+    'started_at': 'start_time',
+    'ended_at': 'end_time',
+    'start_lat': 'start_station_latitude',
+    'start_lng': 'start_station_longitude',
+    'end_lat': 'end_station_latitude',
+    'end_lng': 'end_station_longitude',
+    'member_casual': 'user_type',
+}
+USER_TYPES = {'member': 'Subscriber', 'casual': 'Customer'}
+STATION_ID_COLUMNS = ['start_station_id', 'end_station_id']
+
+
+def load_trips(path=DATA_FILE):
+    """ Load the raw trip data, all columns with inferred types, into a pandas dataframe """
+    return pd.read_csv(path)
+
+
+def _arrow_types():
+    # the csv files write the nullable ids and birth year as floats ('21.0'),
+    # so arrow reads them as float32 and pandas casts them to SCHEMA afterwards
+    types = {'duration_sec': pa.int32(), 'bike_id': pa.int32(),
+             'start_station_id': pa.float32(), 'end_station_id': pa.float32(),
+             'member_birth_year': pa.float32(),
+             'start_time': pa.timestamp('us'), 'end_time': pa.timestamp('us')}
+    for column, dtype in SCHEMA.items():
+        if dtype == 'category':
+            types[column] = pa.dictionary(pa.int32(), pa.string())
+    return types
+
+
+def read_header(path):
+    """ Column names of a csv file """
+    return list(pd.read_csv(path, nrows = 0).columns)
+
+
+def station_id_strings(ids):
+    """ Station ids as strings, the numeric ones without a trailing '.0' """
+    numbers = pd.to_numeric(ids, errors = 'coerce')
+    text = ids.astype(str).where(numbers.isna(), numbers.astype('Int64').astype(str))
+    return text.where(ids.notna())
+
+
+def missing_columns(header):
+    """ COLUMNS a file with the column names in header does not record (duration_sec is computed) """
+    names = {RENAMED_COLUMNS.get(name, name) for name in header} | {'duration_sec'}
+    return [column for column in COLUMNS if column not in names]
+
+
+def harmonize(trips):
+    """ Bring a trip dataframe with another monthly schema to the columns and types of SCHEMA
+
+    Renamed columns get their Ford GoBike names and columns the file does not
+    have are added empty, and listed in trips.attrs['missing_columns']. When
+    some station ids are not numbers (e.g. 'SF-G27') all of them are kept
+    as strings.
+    """
+    missing = missing_columns(trips.columns)
+    trips = trips.rename(columns = RENAMED_COLUMNS)
+    if trips['user_type'].isin(list(USER_TYPES)).any():
+        trips['user_type'] = trips['user_type'].replace(USER_TYPES)
+    trips[TIME_COLUMNS] = trips[TIME_COLUMNS].apply(pd.to_datetime)
+    if 'duration_sec' not in trips:
+        trips['duration_sec'] = (trips['end_time'] - trips['start_time']).dt.total_seconds()
+    for column in COLUMNS:
+        if column not in trips:
+            trips[column] = pd.NA
+
+    types = dict(SCHEMA)
+    if not all(pd.api.types.is_numeric_dtype(trips[column]) for column in STATION_ID_COLUMNS):
+        for column in STATION_ID_COLUMNS:
+            trips[column] = station_id_strings(trips[column])
+            types[column] = 'object'
+    if trips['bike_id'].isna().any():
+        types['bike_id'] = 'Int32'
+    trips = trips[COLUMNS].astype(types)
+    trips.attrs['missing_columns'] = missing
+    return trips
+
+
+def read_trips(path=DATA_FILE, engine=ENGINE):
+    """ Load the columns needed for cleaning with their declared types
+
+    Files that do not have all the columns of the February 2019 file are
+    read in full and brought to the same columns with harmonize().
+
+    engine='pyarrow' (the default with pyarrow) is about four times faster
+    than engine='c' and peaks lower, at about twice the size of the frame
+    while the batches are concatenated; engine='c' needs no pyarrow.
+    """
+    if not set(COLUMNS) <= set(read_header(path)):
+        return harmonize(pd.read_csv(path, low_memory = False))
+    if engine == 'pyarrow':
+        return _read_batches(path)
+    return pd.read_csv(path, usecols = COLUMNS, dtype = SCHEMA, parse_dates = TIME_COLUMNS,
+                       date_format = TIME_FORMAT)[COLUMNS]
+
+
+def _read_batches(path, block_size=BLOCK_SIZE):
+    """ read_trips() with the pyarrow reader, converting its record batches to pandas one at a time """
+    options = pa_csv.ConvertOptions(include_columns = COLUMNS, column_types = _arrow_types(),
+                                     strings_can_be_null = True)
+    reader = pa_csv.open_csv(path, read_options = pa_csv.ReadOptions(block_size = block_size),
+                             convert_options = options)
+    chunks = [batch.to_pandas().astype(SCHEMA, copy = False) for batch in reader]
+    if not chunks:
+        return read_trips(path, engine = 'c')
+    # every batch has its own categories, concat keeps the categorical type only when they are the same
+    for column in [column for column, dtype in SCHEMA.items() if dtype == 'category']:
+        categories = pd.Index(sorted(set().union(*(chunk[column].cat.categories for chunk in chunks))))
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index = True)[COLUMNS]
+
+
+def iter_trips(path=DATA_FILE, chunksize=250_000):
+    """ Read a trip csv file in chunks of chunksize rows, typed like read_trips() """
+    if not set(COLUMNS) <= set(read_header(path)):
+        for chunk in pd.read_csv(path, chunksize = chunksize, low_memory = False):
+            yield harmonize(chunk)
+        return
+    for chunk in pd.read_csv(path, usecols = COLUMNS, dtype = SCHEMA, parse_dates = TIME_COLUMNS,
+                             date_format = TIME_FORMAT, chunksize = chunksize):
+        yield chunk[COLUMNS]
@@ -0,0 +1,236 @@
+"""Sparse origin-destination matrices of the trips.
+
+An ODMatrix counts the trips of every (start station, end station) pair,
+optionally sliced by the hour of the start, the start day, the user type
+or any other categorical column. The station ids are coded once against
+the sorted ids of both columns, every trip becomes one integer key
+
+    (slice * n_stations + origin) * n_stations + destination
+
+and the keys are counted with np.bincount when the dense key space fits
+in max_cells (np.unique otherwise). Only the non-zero cells are kept, as
+sorted keys and counts: the 330 stations of a month have 108900 pairs
+but only a fraction of them carry trips, even split by hour, day and
+user type.
+
+The memory of a matrix is bounded by its non-zero cells, whatever the
+number of trips. from_chunks() and od_archive() add chunks or months one
+at a time with merge(), so the trip rows of only one chunk or month are
+in memory at once. Top routes and the row (outflow) and column (inflow)
+marginals are answered from the kept cells.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from .archive import clean_month, map_months, trip_files
+from .cache import CACHE_DIR
+from .ingest import station_id_strings
+
+# largest key space counted with a dense bincount (8 bytes per cell)
+MAX_CELLS = 1 << 23
+
+# slicing columns computed from the trips instead of read from a column
+DERIVED_SLICES = {'hour': lambda trips: trips['start_time'].dt.hour}
+
+
+def _accumulate(keys, size, max_cells=MAX_CELLS, weights=None):
+    """ (sorted distinct keys, their counts or summed weights) of keys in range(size) """
+    if size <= max_cells:
+        cells = np.bincount(keys, weights, minlength = size)
+        found = np.flatnonzero(cells)
+        return found, cells[found].astype(np.int64)
+    if weights is None:
+        # the runs of equal keys once sorted
+        keys = np.sort(keys)
+        starts = np.flatnonzero(np.diff(keys, prepend = -1))
+        return keys[starts], np.diff(starts, append = len(keys))
+    found, inverse = np.unique(keys, return_inverse = True)
+    return found, np.bincount(inverse, weights, minlength = len(found)).astype(np.int64)
+
+
+def _slice_codes(trips, by, max_cells=MAX_CELLS):
+    """ Slice position of every trip (-1 for missing values) and the slices with trips, as a MultiIndex """
+    labels, codes = [], []
+    for column in by:
+        values = DERIVED_SLICES[column](trips) if column in DERIVED_SLICES else trips[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            level, code = values.cat.categories, values.cat.codes.to_numpy()
+        else:
+            code, level = pd.factorize(values, sort = True)
+        labels.append(pd.Index(level))
+        codes.append(code.astype(np.int64))
+    missing = np.any([code < 0 for code in codes], axis = 0)
+    sizes = [len(level) for level in labels]
+    # mixed radix position of every trip among all combinations of the levels, in sorted order
+    flat = np.ravel_multi_index([np.where(missing, 0, code) for code in codes], sizes)
+    size = int(np.prod(sizes))
+    observed, _ = _accumulate(flat[~missing], size, max_cells)
+    if size <= max_cells:
+        position = np.zeros(size, dtype = np.int64)
+        position[observed] = np.arange(len(observed))
+        slice_codes = np.where(missing, -1, position[flat])
+    else:
+        slice_codes = np.where(missing, -1, np.searchsorted(observed, flat))
+    slices = pd.MultiIndex.from_arrays([level[code] for level, code in zip(labels, np.unravel_index(observed, sizes))],
+                                       names = by)
+    return slice_codes, slices
+
+
+class ODMatrix:
+    """ Non-zero trip counts per slice, origin and destination station """
+
+    def __init__(self, stations, slices, keys, counts, by=()):
+        self.stations = stations
+        self.slices = slices
+        self.keys = keys
+        self.counts = counts
+        self.by = list(by)
+
+    @classmethod
+    def from_trips(cls, trips, by=(), max_cells=MAX_CELLS):
+        """ Count the trips per start and end station and per combination of the columns in by
+
+        by may use 'hour' (of start_time) besides the columns of trips.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        ids = pd.concat([trips['start_station_id'], trips['end_station_id']], ignore_index = True)
+        codes, stations = pd.factorize(ids, sort = True)
+        origin, destination = codes[:len(trips)], codes[len(trips):]
+        keep = (origin >= 0) & (destination >= 0)
+        if by:
+            slice_codes, slices = _slice_codes(trips, by, max_cells)
+            keep &= slice_codes >= 0
+        else:
+            slice_codes = np.zeros(len(trips), dtype = np.int64)
+            slices = pd.MultiIndex.from_arrays([['all']], names = ['group'])
+        n = len(stations)
+        keys = (slice_codes[keep].astype(np.int64) * n + origin[keep]) * n + destination[keep]
+        keys, counts = _accumulate(keys, len(slices) * n * n, max_cells)
+        return cls(pd.Index(stations, name = 'station_id'), slices, keys, counts, by)
+
+    @classmethod
+    def from_chunks(cls, chunks, by=(), max_cells=MAX_CELLS):
+        """ Matrix of an iterable of cleaned trip chunks, e.g. from iter_streamed """
+        return merge_matrices(cls.from_trips(chunk, by, max_cells) for chunk in chunks)
+
+    def __repr__(self):
+        return 'ODMatrix({} stations, {} slices by {}, {} non-zero cells, {} trips)'.format(
+            len(self.stations), len(self.slices), self.by, len(self.keys), self.counts.sum())
+
+    @property
+    def nbytes(self):
+        """ Memory of the cells """
+        return self.keys.nbytes + self.counts.nbytes
+
+    def _decode(self):
+        """ (slice, origin, destination) positions of every cell """
+        n = len(self.stations)
+        return self.keys // (n * n), self.keys // n % n, self.keys % n
+
+    def merge(self, other, max_cells=MAX_CELLS):
+        """ Matrix of the trips of both matrices (e.g. two months) """
+        if other.by != self.by:
+            raise ValueError('cannot merge matrices sliced by different columns')
+        mine, theirs = self.stations, other.stations
+        if pd.api.types.is_numeric_dtype(mine) != pd.api.types.is_numeric_dtype(theirs):
+            # months with ids like 'SF-G27' keep all ids as strings, like combine()
+            mine, theirs = (pd.Index(station_id_strings(pd.Series(ids)), name = 'station_id') for ids in (mine, theirs))
+        stations = mine.append(theirs).unique().sort_values()
+        slices = self.slices.append(other.slices).unique()
+        n = len(stations)
+        keys = []
+        for matrix, ids in ((self, mine), (other, theirs)):
+            slice_codes, origin, destination = matrix._decode()
+            station_codes = stations.get_indexer(ids)
+            slice_codes = slices.get_indexer(matrix.slices)[slice_codes]
+            keys.append((slice_codes * n + station_codes[origin]) * n + station_codes[destination])
+        keys, counts = _accumulate(np.concatenate(keys), len(slices) * n * n, max_cells,
+                                   np.concatenate([self.counts, other.counts]))
+        return ODMatrix(stations, slices, keys, counts, self.by)
+
+    def cells(self, **filters):
+        """ Boolean mask of the cells in the slices matching filters (slice column=value or list of values) """
+        keep = np.ones(len(self.slices), dtype = bool)
+        for column, wanted in filters.items():
+            if column not in self.by:
+                raise KeyError('matrix is not sliced by {}'.format(column))
+            wanted = [wanted] if np.ndim(wanted) == 0 else list(wanted)
+            values = self.slices.get_level_values(column)
+            missing = [value for value in wanted if value not in set(values)]
+            if missing:
+                raise KeyError('{} has no {}'.format(column, missing))
+            keep &= values.isin(wanted)
+        return keep[self._decode()[0]]
+
+    def frame(self, **filters):
+        """ DataFrame of the non-zero cells: slice columns, origin, destination and trips """
+        selected = self.cells(**filters)
+        slice_codes, origin, destination = (codes[selected] for codes in self._decode())
+        frame = self.slices[slice_codes].to_frame(index = False) if self.by else pd.DataFrame(index = range(len(origin)))
+        frame['origin'] = self.stations[origin]
+        frame['destination'] = self.stations[destination]
+        frame['trips'] = self.counts[selected]
+        return frame
+
+    def routes(self, **filters):
+        """ Trips per (origin, destination) pair over the slices matching filters, as (pair keys, counts) """
+        selected = self.cells(**filters)
+        n = len(self.stations)
+        return _accumulate(self.keys[selected] % (n * n), n * n, weights = self.counts[selected])
+
+    def top_routes(self, k=10, **filters):
+        """ The k (origin, destination) pairs with the most trips, busiest first """
+        pairs, counts = self.routes(**filters)
+        if k < len(counts):
+            # only sort the k largest counts
+            top = np.argpartition(-counts, k)[:k]
+        else:
+            top = np.arange(len(counts))
+        top = top[np.lexsort((pairs[top], -counts[top]))]
+        n = len(self.stations)
+        return pd.DataFrame({'origin': self.stations[pairs[top] // n], 'destination': self.stations[pairs[top] % n],
+                             'trips': counts[top]})
+
+    def outflow(self, **filters):
+        """ Trips leaving every station (row marginals) over the slices matching filters """
+        return self._marginal(1, filters)
+
+    def inflow(self, **filters):
+        """ Trips arriving at every station (column marginals) over the slices matching filters """
+        return self._marginal(2, filters)
+
+    def net_flow(self, **filters):
+        """ Arrivals minus departures of every station; stations with a negative net flow lose bikes """
+        return (self.inflow(**filters) - self.outflow(**filters)).rename('net_flow')
+
+    def _marginal(self, axis, filters):
+        selected = self.cells(**filters)
+        codes = self._decode()[axis][selected]
+        return pd.Series(np.bincount(codes, self.counts[selected], minlength = len(self.stations)).astype(np.int64),
+                         index = self.stations, name = 'trips')
+
+    def table(self, stations=None, **filters):
+        """ Dense origin x destination DataFrame of the trips between stations (all stations by default) """
+        pairs, counts = self.routes(**filters)
+        n = len(self.stations)
+        dense = np.zeros((n, n), dtype = np.int64)
+        dense.flat[pairs] = counts
+        table = pd.DataFrame(dense, index = self.stations.rename('origin'), columns = self.stations.rename('destination'))
+        return table if stations is None else table.reindex(index = stations, columns = stations, fill_value = 0)
+
+
+def merge_matrices(matrices):
+    """ Merge an iterable of matrices, e.g. one per month """
+    return reduce(ODMatrix.merge, matrices)
+
+
+def od_month(path, by=(), cache_dir=CACHE_DIR):
+    """ ODMatrix of one monthly file """
+    return ODMatrix.from_trips(clean_month(path, cache_dir), by)
+
+
+def od_archive(source, by=(), processes=None, cache_dir=CACHE_DIR):
+    """ ODMatrix of all monthly files in source, counted in parallel like load_archive() """
+    return merge_matrices(map_months(od_month, trip_files(source), processes, by, cache_dir))
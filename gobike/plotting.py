@@ -0,0 +1,155 @@
+"""Charts drawn from aggregated counts.
+
+seaborn's countplot gets the trip rows and counts them again for every
+figure. count_barplot() takes the counts instead, as a Series indexed by
+the plotted variables (e.g. TripCube.count([...]) or value_counts()), and
+draws the same bars with seaborn's barplot, so drawing a figure costs the
+same for 175 thousand or tens of millions of trips. hist_barplot() does
+the same for plt.hist with histogram counts from gobike.binning, and
+sketch_boxplot()/sketch_violinplot() draw box and violin plots from the
+quantile sketches of gobike.sketches instead of sorting the rows.
+"""
+import inspect
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sb
+
+
+def count_barplot(counts, x=None, y=None, hue=None, order=None, hue_order=None, color=None, ax=None, **kwargs):
+    """ Draw a countplot of x or y (and hue) from counts indexed by those variables
+
+    The arguments are the ones of seaborn's countplot, with counts in place
+    of data. Returns the matplotlib axes.
+    """
+    frame = counts.rename('count').reset_index()
+    if order is None:
+        order = _levels(counts, x if x is not None else y)
+    if hue is not None and hue_order is None:
+        hue_order = _levels(counts, hue)
+    if y is not None:
+        x, y = 'count', y
+    else:
+        x, y = x, 'count'
+    return sb.barplot(data = frame, x = x, y = y, hue = hue, order = order, hue_order = hue_order,
+                      color = color, errorbar = None, ax = ax, **kwargs)
+
+
+def hist_barplot(counts, edges, rwidth=None, ax=None, **kwargs):
+    """ Draw the bars plt.hist would draw for counts over the bin edges
+
+    rwidth and the other keyword arguments are the ones of plt.hist.
+    Returns the bar container.
+    """
+    if ax is None:
+        ax = plt.gca()
+    edges = np.asarray(edges)
+    widths = np.diff(edges)
+    if rwidth is not None:
+        left = edges[:-1] + 0.5 * (1 - rwidth) * widths
+        widths = rwidth * widths
+    else:
+        left = edges[:-1]
+    return ax.bar(left, counts, width = widths, align = 'edge', **kwargs)
+
+
+def sketch_boxplot(sketch, x=None, y=None, data=None, order=None, color=None, ax=None, whis=1.5, **kwargs):
+    """ Draw a boxplot of the sketched variable against the column x or y of the sketch groups
+
+    data is a subset of sketch.frame(), e.g. one facet of a FacetGrid drawn
+    with map_dataframe, all the groups by default. Returns the matplotlib axes.
+    """
+    ax, horizontal, positions, sketch = _sketch_levels(sketch, x, y, data, order, ax)
+    ax.bxp(sketch.box_stats(whis), positions = positions, widths = 0.8, patch_artist = True,
+           manage_ticks = False, boxprops = {'facecolor': color or 'C0', 'edgecolor': '.25'},
+           medianprops = {'color': '.25'}, whiskerprops = {'color': '.25'}, capprops = {'color': '.25'},
+           flierprops = {'marker': 'd', 'markerfacecolor': '.25', 'markeredgecolor': '.25', 'markersize': 4},
+           **_orientation(ax.bxp, horizontal), **kwargs)
+    return ax
+
+
+def sketch_violinplot(sketch, x=None, y=None, data=None, order=None, color=None, ax=None, inner='quartile',
+                      gridsize=100, cut=2, **kwargs):
+    """ Draw a violinplot of the sketched variable against the column x or y of the sketch groups
+
+    The densities are kernel density estimates (Scott's bandwidth) of the
+    bucket counts, spread over the width of each bucket, scaled so every violin has the
+    same area, as seaborn's violinplot does. Returns the matplotlib axes.
+    """
+    ax, horizontal, positions, sketch = _sketch_levels(sketch, x, y, data, order, ax)
+    values = sketch.values()
+    quartiles = sketch.quantile_values([0.25, 0.5, 0.75])
+    spread = 5
+    grids, densities = [], []
+    for row in range(len(positions)):
+        filled = sketch.counts[row] > 0
+        # spread the count of every bucket evenly over its width
+        weights = np.repeat(sketch.counts[row][filled] / sketch.counts[row].sum() / spread, spread)
+        upper = values[filled] * (sketch.gamma + 1) / 2
+        steps = (np.arange(spread) + 0.5) / spread
+        centers = (upper / sketch.gamma)[:, None] * (1 - steps) + upper[:, None] * steps
+        centers = np.clip(centers.ravel(), sketch.minimum[row], sketch.maximum[row])
+        mean = weights @ centers
+        std = np.sqrt(weights @ (centers - mean) ** 2)
+        bandwidth = max(std, 1e-6 * max(abs(mean), 1)) * sketch.counts[row].sum() ** (-1 / 5)
+        grid = np.linspace(sketch.minimum[row] - cut * bandwidth, sketch.maximum[row] + cut * bandwidth, gridsize)
+        kernel = np.exp(-0.5 * ((grid[:, None] - centers[None, :]) / bandwidth) ** 2)
+        grids.append(grid)
+        densities.append(kernel @ weights / (bandwidth * np.sqrt(2 * np.pi)))
+    scale = 0.4 / max(density.max() for density in densities) if densities else 0
+    fill = ax.fill_between if horizontal else ax.fill_betweenx
+    line = ax.vlines if horizontal else ax.hlines
+    for position, grid, density, row in zip(positions, grids, densities, range(len(positions))):
+        fill(grid, position - density * scale, position + density * scale, facecolor = color or 'C0',
+             edgecolor = '.25', linewidth = 1, **kwargs)
+        if inner == 'quartile':
+            for quartile, style in zip(quartiles[:, row], [':', '--', ':']):
+                half = np.interp(quartile, grid, density) * scale
+                line(quartile, position - half, position + half, color = '.25', linestyle = style)
+    return ax
+
+
+def _sketch_levels(sketch, x, y, data, order, ax):
+    """ Axes, orientation, positions and sketch collapsed to the plotted levels """
+    if ax is None:
+        ax = plt.gca()
+    horizontal = y is not None and y != sketch.variable
+    name = y if horizontal else x
+    frame = sketch.frame() if data is None else data
+    if order is None:
+        column = sketch.frame()[name]
+        order = list(column.cat.categories) if hasattr(column, 'cat') else sorted(column.unique())
+    order = list(order)
+    sketch = sketch.collapse(name, rows = frame.index)
+    positions = pd.Index(order).get_indexer(sketch.groups.get_level_values(0))
+    sketch = sketch.collapse(name, rows = np.flatnonzero(positions >= 0))
+    positions = pd.Index(order).get_indexer(sketch.groups.get_level_values(0))
+
+    labels = [str(level) for level in order]
+    if horizontal:
+        ax.set_yticks(range(len(order)), labels)
+        ax.set_ylim(len(order) - 0.5, -0.5)
+        ax.set_xlabel(sketch.variable)
+        ax.set_ylabel(name)
+    else:
+        ax.set_xticks(range(len(order)), labels)
+        ax.set_xlim(-0.5, len(order) - 0.5)
+        ax.set_xlabel(name)
+        ax.set_ylabel(sketch.variable)
+    return ax, horizontal, positions, sketch
+
+
+def _orientation(draw, horizontal):
+    """ orientation keyword of matplotlib >= 3.10, vert before """
+    if 'orientation' in inspect.signature(draw).parameters:
+        return {'orientation': 'horizontal' if horizontal else 'vertical'}
+    return {'vert': not horizontal}
+
+
+def _levels(counts, name):
+    """ Levels of an index level in the order countplot would use: categories, else first appearance """
+    index = counts.index.get_level_values(name) if counts.index.nlevels > 1 else counts.index
+    if hasattr(index, 'categories'):
+        return [level for level in index.categories if level in set(index)]
+    return list(dict.fromkeys(index))
@@ -0,0 +1,133 @@
+"""Slide deck written without Jupyter.
+
+The deck used to be built with `jupyter nbconvert --to slides --post serve
+--no-input`, which starts a kernel to run the notebook and a web server
+to show it. build_deck() reads the markdown cells of the Part2 export
+instead, renders the figures its code cells draw (slides.<name>(data))
+with render_figures() on the Agg backend, and writes one self-contained
+HTML file with a slide per markdown cell and its figure.
+"""
+import base64
+import html
+import os
+import re
+import tempfile
+
+DECK_SCRIPT = 'Ford_GoBike_System_Data_Part2.py'
+
+# a code cell drawing a registered slide
+SLIDE_CALL = re.compile(r'^slides\.(\w+)\(data\)', re.M)
+CELL_MARKER = re.compile(r'^# In\[[ \d]*\]:$')
+
+STYLE = '''body { margin: 0; font-family: Helvetica, Arial, sans-serif; background: #f4f4f4; }
+section { box-sizing: border-box; min-height: 100vh; padding: 4vh 6vw; background: white;
+          border-bottom: 1px solid #ddd; scroll-snap-align: start; }
+html { scroll-snap-type: y mandatory; }
+blockquote { margin: 1em 0; padding-left: 1em; border-left: 4px solid #ccc; color: #444; }
+img, svg { display: block; max-width: 100%; max-height: 75vh; margin: 1em auto; }'''
+
+
+def deck_cells(script=DECK_SCRIPT):
+    """ [(markdown lines, figure names)] of the markdown cells of a notebook export, in order
+
+    Each markdown cell gets the figures drawn by the code cells that follow it.
+    """
+    with open(script) as source:
+        blocks = source.read().split('\n\n\n')
+    cells, code = [], False
+    for block in blocks:
+        # the export starts with the interpreter and encoding lines
+        lines = [line for line in block.strip('\n').splitlines() if not line.startswith(('#!', '# coding:'))]
+        if code:
+            code = False
+            if cells:
+                cells[-1][1].extend(SLIDE_CALL.findall('\n'.join(lines)))
+            continue
+        # a code cell marker ends the block, after the markdown cell before it if any
+        if lines and CELL_MARKER.match(lines[-1]):
+            code = True
+            lines = lines[:-1]
+        markdown = [line for line in lines if line.strip()]
+        if markdown and all(line.startswith('#') for line in markdown):
+            cells.append(([line[2:] if line.startswith('# ') else line[1:] for line in lines], []))
+    return cells
+
+
+def markdown_html(lines):
+    """ HTML of the headings, quotes, links and paragraphs used in the deck markdown """
+    parts = []
+    for line in lines:
+        text = html.escape(line.strip())
+        text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', text)
+        heading = re.match(r'(#{1,6}) (.*)', text)
+        if heading:
+            level = len(heading.group(1))
+            parts.append('<h{0}>{1}</h{0}>'.format(level, heading.group(2)))
+        elif text.startswith('&gt; '):
+            parts.append('<blockquote>{}</blockquote>'.format(text[5:]))
+        elif text:
+            parts.append('<p>{}</p>'.format(text))
+    return '\n'.join(parts)
+
+
+def _image(target, fmt):
+    if fmt == 'svg':
+        with open(target) as image:
+            return image.read()
+    with open(target, 'rb') as image:
+        encoded = base64.b64encode(image.read()).decode('ascii')
+    return '<img src="data:image/png;base64,{}">'.format(encoded)
+
+
+def build_deck(data=None, script=DECK_SCRIPT, target=None, fmt='png', processes=None):
+    """ Write the slide deck of script to target (<script stem>.slides.html) and return its path
+
+    data is the FigureData the figures are drawn from, the default data
+    file when None.
+    """
+    from .figures import render_figures
+
+    cells = deck_cells(script)
+    names = [name for _, figures in cells for name in figures]
+    target = target or deck_file(script)
+    with tempfile.TemporaryDirectory() as out_dir:
+        rendered = render_figures(names, data, out_dir, fmt, processes)
+        write_deck(cells, {name: image for name, (image, _) in rendered.items()}, target, fmt)
+    return target
+
+
+def deck_file(script=DECK_SCRIPT):
+    return os.path.splitext(script)[0] + '.slides.html'
+
+
+def write_deck(cells, images, target, fmt='png', fingerprint=None):
+    """ Write the deck of cells to target, with the figure files in images ({name: file}) """
+    slides = ['<section>\n{}\n{}\n</section>'.format(
+                  markdown_html(lines), '\n'.join(_image(images[name], fmt) for name in figures))
+              for lines, figures in cells]
+    title = html.escape(deck_title(cells))
+    meta = '<meta name="fingerprint" content="{}">\n'.format(fingerprint) if fingerprint else ''
+    with open(target, 'w') as deck:
+        deck.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n{}<title>{}</title>\n'
+                   '<style>\n{}\n</style>\n</head>\n<body>\n{}\n</body>\n</html>\n'.format(
+                       meta, title, STYLE, '\n'.join(slides)))
+
+
+def deck_title(cells):
+    """ Text of the first markdown heading of cells, 'Slides' when there is none """
+    for lines, _ in cells:
+        for line in lines:
+            heading = re.match(r'#{1,6} (.*)', line.strip())
+            if heading and heading.group(1).strip():
+                return heading.group(1).strip()
+    return 'Slides'
+
+
+def deck_fingerprint(target):
+    """ fingerprint written in the deck file target by write_deck, None if there is none """
+    if not os.path.exists(target):
+        return None
+    with open(target) as deck:
+        head = deck.read(512)
+    found = re.search(r'<meta name="fingerprint" content="(\w+)">', head)
+    return found.group(1) if found else None
@@ -0,0 +1,186 @@
+"""Mergeable quantile sketches of duration and age.
+
+The box and violin plots sort the trip rows of every station, day or
+time of the day again for every figure. A QuantileSketch keeps, for each
+group of trips, the number of values in logarithmic buckets: bucket k
+holds the values in (gamma ** (k - 1), gamma ** k] with
+gamma = (1 + alpha) / (1 - alpha), and is read back as
+2 * gamma ** k / (gamma + 1). Any quantile returned by a sketch is then
+within alpha (1% by default) of the value of that rank, relative to the
+value, the same guarantee as DDSketch.
+
+The number of buckets depends on the range of the values only, not on
+the number of trips (durations of 1 minute to 1 day take about 365
+buckets per group at 1%), and the buckets of two sketches simply add up,
+so sketches of months or chunks of a file are merged with merge() and
+collapsed to any coarser grouping with quantiles() or summary().
+Values must be positive.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+# relative error of the quantiles
+ALPHA = 0.01
+
+# grouping used by the box and violin plots of the top stations
+SKETCH_DIMENSIONS = ['start_station_id', 'start_station_name', 'start_day', 'day_period', 'user_type']
+
+
+class QuantileSketch:
+    """ Bucket counts of one variable per group of trips, with the exact minimum and maximum """
+
+    def __init__(self, variable, groups, counts, offset, minimum, maximum, alpha=ALPHA):
+        self.variable = variable
+        self.groups = groups
+        self.counts = counts
+        self.offset = offset
+        self.minimum = minimum
+        self.maximum = maximum
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+
+    @classmethod
+    def from_trips(cls, trips, variable, by=SKETCH_DIMENSIONS, alpha=ALPHA):
+        """ Sketch variable per combination of the columns in by, in one pass over trips """
+        codes, groups = group_codes(trips, by)
+        return cls.from_codes(variable, trips[variable], codes, groups, alpha)
+
+    @classmethod
+    def from_codes(cls, variable, values, codes, groups, alpha=ALPHA):
+        """ Sketch values per group, given the group position of every value (-1 for none) """
+        values = values.to_numpy(dtype = np.float64, na_value = np.nan)
+        keep = (codes >= 0) & (values > 0)
+        codes, values = codes[keep], values[keep]
+
+        gamma = (1 + alpha) / (1 - alpha)
+        keys = np.ceil(np.log(values) / np.log(gamma)).astype(np.int64)
+        offset = int(keys.min()) if len(keys) else 0
+        width = int(keys.max()) - offset + 1 if len(keys) else 1
+        counts = np.bincount(codes * width + keys - offset, minlength = len(groups) * width)
+        minimum = pd.Series(values).groupby(codes).min().reindex(range(len(groups))).to_numpy()
+        maximum = pd.Series(values).groupby(codes).max().reindex(range(len(groups))).to_numpy()
+        return cls(variable, groups, counts.reshape(len(groups), width), offset, minimum, maximum, alpha)
+
+    @classmethod
+    def from_chunks(cls, chunks, variables=('age', 'duration_mins'), by=SKETCH_DIMENSIONS, alpha=ALPHA):
+        """ One sketch per variable over an iterable of cleaned trip chunks, e.g. from iter_trips
+
+        Only the sketches are kept between chunks, so memory use does not
+        grow with the number of trips.
+        """
+        sketches = {variable: None for variable in variables}
+        for chunk in chunks:
+            for variable in variables:
+                sketch = cls.from_trips(chunk, variable, by, alpha)
+                sketches[variable] = sketch if sketches[variable] is None else sketches[variable].merge(sketch)
+        return sketches
+
+    def __repr__(self):
+        return 'QuantileSketch({!r}, {} groups, {} buckets, alpha = {})'.format(
+            self.variable, len(self.groups), self.counts.shape[1], self.alpha)
+
+    def merge(self, other):
+        """ Sketch of the trips of both sketches (e.g. two months), group by group """
+        if other.alpha != self.alpha or other.variable != self.variable:
+            raise ValueError('cannot merge sketches of different variables or alpha')
+        if list(other.groups.names) != list(self.groups.names):
+            raise ValueError('cannot merge sketches grouped by different columns')
+        groups = self.groups.append(other.groups).unique()
+        offset = min(self.offset, other.offset)
+        width = max(self.offset + self.counts.shape[1], other.offset + other.counts.shape[1]) - offset
+        counts = np.zeros((len(groups), width), dtype = np.int64)
+        minimum = np.full(len(groups), np.inf)
+        maximum = np.full(len(groups), -np.inf)
+        for sketch in (self, other):
+            rows = groups.get_indexer(sketch.groups)
+            start = sketch.offset - offset
+            counts[rows, start:start + sketch.counts.shape[1]] += sketch.counts
+            minimum[rows] = np.fmin(minimum[rows], sketch.minimum)
+            maximum[rows] = np.fmax(maximum[rows], sketch.maximum)
+        return QuantileSketch(self.variable, groups, counts, offset, minimum, maximum, self.alpha)
+
+    def frame(self):
+        """ The groups of the sketch, one row per group (the row number is the group position) """
+        return self.groups.to_frame(index = False)
+
+    def collapse(self, by=(), rows=None):
+        """ Sketch merged down to the columns in by, optionally from the group positions in rows only """
+        by = [by] if isinstance(by, str) else list(by)
+        rows = np.arange(len(self.groups)) if rows is None else np.asarray(rows)
+        if by:
+            codes, groups = group_codes(self.frame().iloc[rows], by)
+        else:
+            codes = np.zeros(len(rows), dtype = np.int64)
+            groups = pd.MultiIndex.from_arrays([['all']], names = ['group'])
+        counts = np.zeros((len(groups), self.counts.shape[1]), dtype = np.int64)
+        np.add.at(counts, codes, self.counts[rows])
+        minimum = pd.Series(self.minimum[rows]).groupby(codes).min().to_numpy()
+        maximum = pd.Series(self.maximum[rows]).groupby(codes).max().to_numpy()
+        return QuantileSketch(self.variable, groups, counts, self.offset, minimum, maximum, self.alpha)
+
+    def values(self):
+        """ Value every bucket is read back as """
+        keys = self.offset + np.arange(self.counts.shape[1])
+        return 2 * self.gamma ** keys / (self.gamma + 1)
+
+    def quantile_values(self, q):
+        """ Array of the q quantiles (rows) of every group (columns) """
+        q = np.atleast_1d(q)
+        cumulative = self.counts.cumsum(axis = 1)
+        total = cumulative[:, -1]
+        # lower rank of the quantile, as numbered from 0
+        ranks = np.floor(q[:, None] * (total[None, :] - 1))
+        buckets = (cumulative[None, :, :] > ranks[:, :, None]).argmax(axis = 2)
+        values = np.clip(self.values()[buckets], self.minimum, self.maximum)
+        return np.where(total > 0, values, np.nan)
+
+    def quantiles(self, q=(0.25, 0.5, 0.75), by=()):
+        """ DataFrame of the q quantiles per combination of the columns in by """
+        sketch = self.collapse(by)
+        index = sketch.groups.get_level_values(0) if sketch.groups.nlevels == 1 else sketch.groups
+        return pd.DataFrame(sketch.quantile_values(q).T, index = index, columns = list(np.atleast_1d(q)))
+
+    def summary(self, by=()):
+        """ count, mean, min, quartiles and max per combination of the columns in by, like describe() """
+        sketch = self.collapse(by)
+        total = sketch.counts.sum(axis = 1)
+        quartiles = sketch.quantile_values([0.25, 0.5, 0.75])
+        index = sketch.groups.get_level_values(0) if sketch.groups.nlevels == 1 else sketch.groups
+        return pd.DataFrame({'count': total,
+                             'mean': sketch.counts @ sketch.values() / np.where(total > 0, total, np.nan),
+                             'min': sketch.minimum, '25%': quartiles[0], '50%': quartiles[1],
+                             '75%': quartiles[2], 'max': sketch.maximum}, index = index)
+
+    def box_stats(self, whis=1.5):
+        """ Box plot statistics of every group, in the format of matplotlib's Axes.bxp """
+        values = self.values()
+        quartiles = self.quantile_values([0.25, 0.5, 0.75])
+        stats = []
+        for row in range(len(self.groups)):
+            q1, median, q3 = quartiles[:, row]
+            low, high = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+            filled = np.clip(values[self.counts[row] > 0], self.minimum[row], self.maximum[row])
+            inside = filled[(filled >= low) & (filled <= high)]
+            stats.append({'med': median, 'q1': q1, 'q3': q3,
+                          'whislo': inside.min() if len(inside) else q1,
+                          'whishi': inside.max() if len(inside) else q3,
+                          'fliers': filled[(filled < low) | (filled > high)]})
+        return stats
+
+
+def group_codes(frame, by):
+    """ Group position of every row of frame (-1 for missing keys) and the groups, as a MultiIndex """
+    by = [by] if isinstance(by, str) else list(by)
+    grouped = frame.groupby(by, observed = True, sort = True)
+    codes = grouped.ngroup().to_numpy()
+    groups = grouped.size().index
+    if not isinstance(groups, pd.MultiIndex):
+        groups = pd.MultiIndex.from_arrays([groups], names = by)
+    return codes, groups
+
+
+def merge_sketches(sketches):
+    """ Merge an iterable of sketches, e.g. one per month """
+    return reduce(QuantileSketch.merge, sketches)
@@ -0,0 +1,148 @@
+"""Figures of the Part2 slide deck, registered with gobike.figures.
+
+Each function draws one slide from a FigureData; Part2 calls them cell by
+cell and render_figures() draws all of them in parallel. uses lists the
+data each slide draws from, so the incremental build only redraws the
+slides whose data or code changed.
+"""
+import matplotlib.pyplot as plt
+import seaborn as sb
+
+from .figures import figure
+from .plotting import count_barplot, sketch_boxplot, sketch_violinplot
+
+
+@figure('top_stations', uses = ('cube',))
+def top_stations(data):
+    """ Top 10 stations with most trip """
+    plt.figure(figsize = (15, 8))
+    count_barplot(data.cube.count('start_station_name'), y = 'start_station_name', color = data.colour, order = data.ordr)
+    plt.title('Top 10 stations with most trip')
+    plt.xlabel('Number of trips')
+    plt.ylabel('Stations name')
+
+
+@figure('weekly_rides', uses = ('cube', 'bitmaps'))
+def weekly_rides(data):
+    """ Day of the week riders prefer most to ride the most """
+    plt.figure(figsize = (20, 5))
+    plt.suptitle('Number of Weekly Rides in Top 10 Stations')
+    plt.subplot(1, 2, 1)
+    count_barplot(data.cube.count('start_day'), x = 'start_day', color = data.colour)
+    plt.xlabel('Start Days of the Week')
+    plt.ylabel('Number of trips')
+
+    plt.subplot(1, 2, 2)
+    count_barplot(data.bitmaps.counts('end_day', start_station_id = data.station), x = 'end_day', color = data.colour)
+    plt.xlabel('End Days of the Week')
+    plt.ylabel('Number of trips')
+
+
+@figure('day_period_rides', uses = ('cube',))
+def day_period_rides(data):
+    """ Time of the day most riders prefer """
+    plt.figure(figsize = (10, 5))
+    count_barplot(data.cube.count('day_period'), x = 'day_period', color = data.colour)
+    plt.title('Number of Rides for each Time of the Day')
+    plt.xlabel('Time of day')
+    plt.ylabel('Number of trips')
+
+
+@figure('station_age', uses = ('age_sketch', 'cube'))
+def station_age(data):
+    """ Age of riders with most trip """
+    plt.figure(figsize = (10, 5))
+    sketch_violinplot(data.age_sketch, x = 'age', y = 'start_station_name', color = data.colour, order = data.ordr)
+    plt.xscale('log')
+    xticker = [15, 20, 30, 40, 60, 80, 100, 150]
+    label = ['{}'.format(v) for v in xticker]
+    plt.xticks(xticker, label)
+    plt.title('Relationship between Station and Age')
+    plt.xlabel('Age (years)')
+    plt.ylabel('Station names')
+
+
+def _station_heatmap(data, column, label, name):
+    """ Heatmap and countplot of the top stations against column """
+    plt.figure(figsize = (10, 10))
+
+    plt.subplot(2, 1, 1)
+    cat_count = data.cube.table('start_station_name', column)
+    sb.heatmap(cat_count, annot = True, fmt = '.1f', cbar_kws = {'label': 'Number of trips'})
+    plt.title('HeatMap showing Relationship between Station and {}'.format(name))
+    plt.xlabel(label)
+    plt.ylabel('Station names')
+
+    plt.subplot(2, 1, 2)
+    count_barplot(data.cube.count(['start_station_name', column]), y = 'start_station_name', hue = column, order = data.ordr)
+    plt.legend(bbox_to_anchor = (1, 1), title = label)
+    plt.title('Plot showing Relationship between Station and {}'.format(name))
+    plt.xlabel('Number of trips')
+    plt.ylabel('Station names')
+
+
+@figure('station_day', uses = ('cube',))
+def station_day(data):
+    """ Top 10 stations with most trips by day of the week """
+    _station_heatmap(data, 'start_day', 'Day of the week', 'Day of the Week')
+
+
+@figure('station_period', uses = ('cube',))
+def station_period(data):
+    """ Top 10 stations with most trips by time of the day """
+    _station_heatmap(data, 'day_period', 'Time of the day', 'Time of the Day')
+
+
+@figure('user_type_day', uses = ('cube',))
+def user_type_day(data):
+    """ Top 10 trips in day of the week by user type """
+    plt.figure(figsize = (12, 14))
+    for row, user_type in enumerate(['Subscriber', 'Customer'], 1):
+        plt.subplot(2, 1, row)
+        count_barplot(data.cube.count(['start_station_name', 'start_day'], user_type = user_type),
+                      y = 'start_station_name', hue = 'start_day', order = data.ordr)
+        plt.legend(bbox_to_anchor = (1, 1), title = 'Day of the week')
+        plt.xlabel('Number of trips')
+        plt.ylabel('Station names')
+        plt.title('Top 10 Trips in Day of the Week by {}'.format(user_type))
+
+
+def _duration_grid(data, groups, column, col_wrap, title):
+    """ Duration boxplots of the top stations, one facet per level of column """
+    g = sb.FacetGrid(data = groups, col = column, col_wrap = col_wrap)
+    g.map_dataframe(sketch_boxplot, sketch = data.duration_sketch, x = 'start_station_id', order = data.order,
+                    color = data.colour)
+    g.set_axis_labels('start_station_id', 'duration_mins')
+    plt.yscale('log')
+    ticker = [0.08, 10, 20, 100, 1000]
+    plt.yticks(ticker, ticker)
+    g.fig.subplots_adjust(top=0.9)
+    g.fig.suptitle(title)
+
+
+@figure('subscriber_duration_day', uses = ('duration_sketch', 'bitmaps'))
+def subscriber_duration_day(data):
+    """ Duration of subscribers by day of the week in top 10 station """
+    _duration_grid(data, data.subscribers, 'start_day', 3,
+                   'Relationship between Duration and Station by Day of the Week for Subscribers')
+
+
+@figure('subscriber_duration_period', uses = ('duration_sketch', 'bitmaps'))
+def subscriber_duration_period(data):
+    """ Duration of subscribers by time of the day in top 10 station """
+    _duration_grid(data, data.subscribers, 'day_period', 2,
+                   'Relationship between Duration and Station by Time of the Day for Subscribers')
+
+
+@figure('customer_duration_day', uses = ('duration_sketch', 'bitmaps'))
+def customer_duration_day(data):
+    """ Duration of customers by day of the week in top 10 station """
+    _duration_grid(data, data.customers, 'start_day', 3,
+                   'Relationship between Duration and Station by Day of the Week for Customers')
+
+
+@figure('customer_duration_period', uses = ('duration_sketch', 'bitmaps'))
+def customer_duration_period(data):
+    """ Duration of customers by time of the day in top 10 station """
+    _duration_grid(data, data.customers, 'day_period', 2,
+                   'Relationship between Duration and Station by Time of the Day for Customers')
@@ -0,0 +1,227 @@
+"""Station coordinates, distances and a grid index for radius and nearest-station queries.
+
+The cleaning keeps one row per trip without the latitude and longitude
+of its stations. read_station_coordinates() reads those four columns
+from the csv on their own and reduces them to one row per station id
+(the median position, a few stations were moved slightly), which joins
+the station dimension with station_table(trips, coordinates).
+
+StationIndex buckets the stations in a regular grid of square cells
+(500 m by default) on a local flat projection. A radius query only looks
+at the stations of the cells the radius reaches around the cell of each
+point, widened by the narrowing of the cells north of the mean latitude. For k-nearest queries every cell near the stations keeps the short
+list of stations that can be among the k nearest of any point inside it
+(bounded from its centre), computed once per k; the points far from every
+station are compared with all of them. The distances themselves are
+haversine distances, so the results are exact, and queries over millions
+of points are a few vectorized passes. Trips are matched through their
+station ids, e.g. the trips starting within 500 m of a point are
+in_stations() of the stations within 500 m of it.
+"""
+import numpy as np
+import pandas as pd
+
+from .ingest import RENAMED_COLUMNS, STATION_ID_COLUMNS, read_header, station_id_strings
+from .stations import in_stations
+
+# mean radius of the earth, in metres
+EARTH_RADIUS = 6_371_008.8
+
+# points queried at once, bounds the candidate arrays
+BLOCK = 100_000
+
+# cells around the stations keeping a list of nearest-station candidates
+LISTED_RING = 4
+
+COORDINATE_COLUMNS = {'start_station_id': ['start_station_latitude', 'start_station_longitude'],
+                      'end_station_id': ['end_station_latitude', 'end_station_longitude']}
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """ Great circle distance in metres between points given in degrees (numbers or arrays) """
+    latitude1, longitude1, latitude2, longitude2 = (np.radians(np.asarray(value, dtype = np.float64))
+                                                    for value in (latitude1, longitude1, latitude2, longitude2))
+    a = (np.sin((latitude2 - latitude1) / 2) ** 2 +
+         np.cos(latitude1) * np.cos(latitude2) * np.sin((longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def read_station_coordinates(path):
+    """ latitude and longitude of every station id of a trip csv file, one row per station """
+    inverse = {new: old for old, new in RENAMED_COLUMNS.items()}
+    header = set(read_header(path))
+    # the Bay Wheels files from April 2020 on name the coordinates start_lat, start_lng...
+    names = {column: column if column in header else inverse.get(column, column)
+             for columns in COORDINATE_COLUMNS.items() for column in [columns[0]] + columns[1]}
+    raw = pd.read_csv(path, usecols = list(names.values())).rename(columns = {v: k for k, v in names.items()})
+    stacked = pd.concat([raw[[station] + columns].set_axis(['station_id', 'latitude', 'longitude'], axis = 1)
+                         for station, columns in COORDINATE_COLUMNS.items()], ignore_index = True).dropna()
+    if pd.api.types.is_numeric_dtype(stacked['station_id']):
+        stacked['station_id'] = stacked['station_id'].astype('int64')
+    else:
+        stacked['station_id'] = station_id_strings(stacked['station_id'])
+    return stacked.groupby('station_id').median().sort_index()
+
+
+def trip_distances(trips, coordinates):
+    """ Haversine distance in metres between the start and end station of every trip (NaN if unknown) """
+    ends = {}
+    for column in STATION_ID_COLUMNS:
+        rows = coordinates.index.get_indexer(trips[column])
+        known = rows >= 0
+        ends[column] = [np.where(known, coordinates[axis].to_numpy()[rows], np.nan) for axis in ['latitude', 'longitude']]
+    return pd.Series(haversine(*ends['start_station_id'], *ends['end_station_id']), index = trips.index,
+                     name = 'distance_m')
+
+
+class StationIndex:
+    """ Grid of the station coordinates (a DataFrame of latitude and longitude indexed by station id) """
+
+    def __init__(self, coordinates, cell=500):
+        self.coordinates = coordinates
+        self.cell = cell
+        self.latitude = coordinates['latitude'].to_numpy(dtype = np.float64)
+        self.longitude = coordinates['longitude'].to_numpy(dtype = np.float64)
+        self.scale = np.cos(np.radians(self.latitude.mean()))
+        # LISTED_RING empty cells on every side
+        margin = LISTED_RING * cell / EARTH_RADIUS
+        self.origin = (self.latitude.min() - np.degrees(margin), self.longitude.min() - np.degrees(margin / self.scale))
+        cells = self._cells(self.latitude, self.longitude)
+        self.shape = tuple(cells.max(axis = 1) + 1 + LISTED_RING)
+        keys = np.ravel_multi_index(cells, self.shape)
+        # stations sorted by cell, those of cell c are order[starts[c]:starts[c + 1]]
+        self.order = np.argsort(keys, kind = 'stable')
+        self.starts = np.searchsorted(keys[self.order], np.arange(np.prod(self.shape) + 1))
+        # candidate lists of the cells per k, see nearest()
+        self._lists = {}
+
+    def __repr__(self):
+        return 'StationIndex({} stations, {}x{} cells of {} m)'.format(len(self.coordinates), *self.shape, self.cell)
+
+    def _cells(self, latitude, longitude):
+        """ (row, column) grid cell of points, on an equirectangular projection around the stations """
+        y = np.radians(latitude - self.origin[0]) * EARTH_RADIUS
+        x = np.radians(longitude - self.origin[1]) * EARTH_RADIUS * self.scale
+        return np.floor(np.stack([y, x]) / self.cell).astype(np.int64)
+
+    def _candidates(self, latitude, longitude, ring):
+        """ (point, station) positions of the stations in the cells within ring cells of every point """
+        if (2 * ring + 1) ** 2 >= len(self.coordinates):
+            # as many cells as stations: every station is a candidate
+            points = np.repeat(np.arange(len(latitude)), len(self.coordinates))
+            return points, np.tile(np.arange(len(self.coordinates)), len(latitude))
+        cells = self._cells(latitude, longitude)
+        points, stations = [], []
+        for dy in range(-ring, ring + 1):
+            for dx in range(-ring, ring + 1):
+                row, column = cells[0] + dy, cells[1] + dx
+                valid = (row >= 0) & (row < self.shape[0]) & (column >= 0) & (column < self.shape[1])
+                key = np.where(valid, row * self.shape[1] + column, 0)
+                start = self.starts[key]
+                lengths = np.where(valid, self.starts[key + 1] - start, 0)
+                # concatenated ranges start[i]:start[i] + lengths[i]
+                offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+                points.append(np.repeat(np.arange(len(lengths)), lengths))
+                stations.append(self.order[np.repeat(start, lengths) + offsets])
+        return np.concatenate(points), np.concatenate(stations)
+
+    def _distances(self, latitude, longitude, ring):
+        """ (point, station, distance) of the candidates of every point, by point and nearest first """
+        points, stations = self._candidates(latitude, longitude, ring)
+        distance = haversine(latitude[points], longitude[points], self.latitude[stations], self.longitude[stations])
+        order = np.lexsort((distance, points))
+        return points[order], stations[order], distance[order]
+
+    def _ring(self, radius):
+        """ Cells around the cell of a point that hold every station within radius of it """
+        # north of the mean latitude a cell spans less than cell metres of longitude, by up to the
+        # ratio of the cosines at the mean and at the northernmost latitude a station is reached at
+        north = min(np.abs(self.latitude).max() + np.degrees(radius / EARTH_RADIUS), 89.9)
+        slack = max(self.scale / np.cos(np.radians(north)), 1) * 1.02
+        return int(np.ceil(radius * slack / self.cell))
+
+    def within(self, latitude, longitude, radius=500):
+        """ Stations within radius metres of the points (numbers or arrays)
+
+        Returns a DataFrame with the position of the point, the station id
+        and the distance, nearest first for every point.
+        """
+        latitude, longitude = np.atleast_1d(latitude).astype(np.float64), np.atleast_1d(longitude).astype(np.float64)
+        points, stations, distance = [], [], []
+        for block in range(0, len(latitude), BLOCK):
+            found = self._distances(latitude[block:block + BLOCK], longitude[block:block + BLOCK], self._ring(radius))
+            near = found[2] <= radius
+            points.append(found[0][near] + block)
+            stations.append(found[1][near])
+            distance.append(found[2][near])
+        stations = np.concatenate(stations) if stations else np.zeros(0, dtype = np.int64)
+        return pd.DataFrame({'point': np.concatenate(points) if points else stations,
+                             'station_id': self.coordinates.index[stations],
+                             'distance_m': np.concatenate(distance) if distance else np.zeros(0)})
+
+    def _cell_lists(self, k):
+        """ (slot of every cell or -1, station positions padded with -1 per slot) holding the k nearest
+        stations of any point of the cells within LISTED_RING cells of a station """
+        if k not in self._lists:
+            keys = np.flatnonzero(np.diff(self.starts))
+            rows, columns = np.unravel_index(keys, self.shape)
+            ring = range(-LISTED_RING, LISTED_RING + 1)
+            near = np.unique(np.concatenate([np.ravel_multi_index((rows + dy, columns + dx), self.shape, mode = 'clip')
+                                             for dy in ring for dx in ring]))
+            rows, columns = np.unravel_index(near, self.shape)
+            latitude = self.origin[0] + np.degrees((rows + 0.5) * self.cell / EARTH_RADIUS)
+            longitude = self.origin[1] + np.degrees((columns + 0.5) * self.cell / (EARTH_RADIUS * self.scale))
+            distance = haversine(latitude[:, None], longitude[:, None], self.latitude[None], self.longitude[None])
+            kth = np.partition(distance, k - 1, axis = 1)[:, k - 1]
+            # a point of the cell is within half a diagonal h of its centre, so its k nearest stations
+            # are within kth + h of it and kth + 2h of the centre (2% slack for the flat projection)
+            keep = distance <= (kth + 2 * 1.02 * self.cell * np.sqrt(0.5))[:, None]
+            order = np.argsort(~keep, axis = 1, kind = 'stable')[:, :keep.sum(axis = 1).max()]
+            slots = np.full(np.prod(self.shape), -1, dtype = np.int64)
+            slots[near] = np.arange(len(near))
+            self._lists[k] = slots, np.where(np.take_along_axis(keep, order, axis = 1), order, -1)
+        return self._lists[k]
+
+    def _brute(self, latitude, longitude, k, candidates=None):
+        """ (station positions, distances) of the k nearest stations of every point, among
+        candidates (an array of station positions per point, -1 for none) or all stations """
+        found = np.zeros((len(latitude), k), dtype = np.int64)
+        best = np.zeros((len(latitude), k))
+        width = len(self.coordinates) if candidates is None else candidates.shape[1]
+        rows = max(1, BLOCK * 10 // width)
+        for block in range(0, len(latitude), rows):
+            if candidates is None:
+                stations = np.broadcast_to(np.arange(width), (len(latitude[block:block + rows]), width))
+            else:
+                stations = candidates[block:block + rows]
+            distance = haversine(latitude[block:block + rows, None], longitude[block:block + rows, None],
+                                 self.latitude[stations], self.longitude[stations])
+            distance[stations < 0] = np.inf
+            top = np.argpartition(distance, k - 1, axis = 1)[:, :k] if k < width else \
+                np.broadcast_to(np.arange(k), distance.shape).copy()
+            top = np.take_along_axis(top, np.argsort(np.take_along_axis(distance, top, axis = 1), axis = 1), axis = 1)
+            found[block:block + rows] = np.take_along_axis(stations, top, axis = 1)
+            best[block:block + rows] = np.take_along_axis(distance, top, axis = 1)
+        return found, best
+
+    def nearest(self, latitude, longitude, k=1):
+        """ (station ids, distances in metres) of the k nearest stations of every point, arrays of shape (points, k) """
+        latitude, longitude = np.atleast_1d(latitude).astype(np.float64), np.atleast_1d(longitude).astype(np.float64)
+        k = min(k, len(self.coordinates))
+        slots, lists = self._cell_lists(k)
+        cells = self._cells(latitude, longitude)
+        inside = (cells >= 0).all(axis = 0) & (cells[0] < self.shape[0]) & (cells[1] < self.shape[1])
+        slot = np.full(len(latitude), -1, dtype = np.int64)
+        slot[inside] = slots[np.ravel_multi_index(cells[:, inside], self.shape)]
+        listed = slot >= 0
+        found = np.zeros((len(latitude), k), dtype = np.int64)
+        best = np.zeros((len(latitude), k))
+        found[listed], best[listed] = self._brute(latitude[listed], longitude[listed], k, lists[slot[listed]])
+        # the points far from every station are compared with all of them
+        found[~listed], best[~listed] = self._brute(latitude[~listed], longitude[~listed], k)
+        return self.coordinates.index.to_numpy()[found], best
+
+    def trips_within(self, trips, latitude, longitude, radius=500, by='start_station_id'):
+        """ Boolean mask of the trips whose station in column by is within radius metres of a point """
+        stations = self.within(latitude, longitude, radius)['station_id'].unique()
+        return in_stations(trips, stations, by)
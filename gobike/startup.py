@@ -0,0 +1,60 @@
+"""Import time report of the command line, like python -X importtime.
+
+profile_command() runs a python -m gobike command again in a child
+interpreter started with -X importtime and passes its output through.
+parse_importtime() reads the import lines of that output and
+import_report() formats where the start-up time went: the total time
+spent importing, the top-level packages by their own import time, and
+the slowest imports with everything they imported. Only the standard library is
+used here, so the report does not change what it measures.
+"""
+import re
+import subprocess
+import sys
+
+# one line of -X importtime: self and cumulative microseconds, then the indented module name
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(text):
+    """ [(module, self seconds, cumulative seconds, depth)] of the -X importtime lines in text """
+    imports = []
+    for line in text.splitlines():
+        found = IMPORT_LINE.match(line)
+        if found:
+            own, cumulative, indent, module = found.groups()
+            imports.append((module, int(own) / 1e6, int(cumulative) / 1e6, (len(indent) - 1) // 2))
+    return imports
+
+
+def import_report(imports, top=10):
+    """ Text report of parsed -X importtime lines """
+    total = sum(own for _, own, _, _ in imports)
+    packages = {}
+    for module, own, _, _ in imports:
+        package = module.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+    lines = ['imports: {} modules in {:.3f}s'.format(len(imports), total), '', 'by package (self time):']
+    for package, seconds in sorted(packages.items(), key = lambda item: -item[1])[:top]:
+        lines.append('  {:<28} {:>7.3f}s {:>5.1%}'.format(package, seconds, seconds / total if total else 0))
+    lines += ['', 'slowest imports (cumulative):']
+    # the first imports of every top-level import statement
+    roots = [(module, cumulative) for module, _, cumulative, depth in imports if depth == 0]
+    for module, seconds in sorted(roots, key = lambda item: -item[1])[:top]:
+        lines.append('  {:<28} {:>7.3f}s'.format(module, seconds))
+    return '\n'.join(lines)
+
+
+def profile_command(argv, top=10):
+    """ Run python -m gobike argv with -X importtime, print its output and the import report
+
+    Returns the exit code of the command.
+    """
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'gobike'] + list(argv),
+                           stderr = subprocess.PIPE, text = True)
+    imports = parse_importtime(child.stderr)
+    other = [line for line in child.stderr.splitlines() if not line.startswith('import time:')]
+    if other:
+        print('\n'.join(other), file = sys.stderr)
+    print(import_report(imports, top), file = sys.stderr)
+    return child.returncode
@@ -0,0 +1,64 @@
+"""Station dimension of the trip data.
+
+The trip rows carry both the id and the name of their start and end
+stations. station_table() reduces them to one row per station id, so that
+station names can be looked up or joined when needed while group-bys,
+joins and filters work on the integer ids: top_n_stations() counts trips
+per station code and in_stations() selects rows with a lookup table
+indexed by station id instead of comparing names.
+"""
+import numpy as np
+import pandas as pd
+
+
+def station_table(trips, coordinates=None):
+    """ One row per station id with its name and its number of trip starts and ends
+
+    When a station was renamed during the period covered by trips the most
+    frequent name is kept. coordinates (e.g. read_station_coordinates) adds
+    the latitude and longitude of the stations.
+    """
+    ends = {'end_station_id': 'start_station_id', 'end_station_name': 'start_station_name'}
+    pairs = pd.concat([trips[['start_station_id', 'start_station_name']],
+                       trips[['end_station_id', 'end_station_name']].rename(columns = ends)])
+    names = pairs.value_counts().reset_index().drop_duplicates('start_station_id')
+
+    stations = pd.DataFrame({'station_name': names.set_index('start_station_id')['start_station_name']})
+    stations['start_trips'] = trips['start_station_id'].value_counts()
+    stations['end_trips'] = trips['end_station_id'].value_counts()
+    stations[['start_trips', 'end_trips']] = stations[['start_trips', 'end_trips']].fillna(0).astype('int64')
+    stations.index.name = 'station_id'
+    if coordinates is not None:
+        stations = stations.join(coordinates[['latitude', 'longitude']])
+    return stations.sort_index()
+
+
+def station_names(ids, stations):
+    """ Names of the station ids in ids, looked up in a station_table """
+    return pd.Series(stations['station_name'].reindex(ids).to_numpy(), index = getattr(ids, 'index', None))
+
+
+def top_n_stations(trips, n=10, by='start_station_id'):
+    """ Ids of the n stations with the most trips in column by, busiest first """
+    codes, ids = pd.factorize(trips[by], sort = True)
+    counts = np.bincount(codes[codes >= 0], minlength = len(ids))
+    if n < len(counts):
+        # only sort the n largest counts
+        top = np.argpartition(-counts, n)[:n]
+    else:
+        top = np.arange(len(counts))
+    top = top[np.lexsort((top, -counts[top]))]
+    return pd.Index(ids[top], name = by)
+
+
+def in_stations(trips, stations, by='start_station_id'):
+    """ Boolean mask of the trips whose column by is one of the station ids in stations """
+    ids = trips[by]
+    if not pd.api.types.is_integer_dtype(ids) or not pd.api.types.is_integer_dtype(pd.Index(stations)):
+        return ids.isin(stations).to_numpy()
+    # one entry per possible id, missing ids (-1) look up the last entry which stays False
+    values = ids.to_numpy(dtype = np.int64, na_value = -1)
+    size = max(values.max(initial = 0), max(stations, default = 0)) + 2
+    lookup = np.zeros(size, dtype = bool)
+    lookup[np.asarray(stations, dtype = np.int64)] = True
+    return lookup[values]
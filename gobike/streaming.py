@@ -0,0 +1,61 @@
+"""Cleaning trip files that do not fit in memory.
+
+stream_trips() reads the csv file in chunks, runs the clean_trips() steps
+on every chunk and appends the cleaned chunks as row groups to a Parquet
+file, so at most one raw and one cleaned chunk are in memory at a time.
+All the cleaning steps work row by row, which makes the cleaned chunks
+together equal to cleaning the whole file at once.
+"""
+import os
+
+from .cleaning import clean_trips
+from .ingest import DATA_FILE, iter_trips, missing_columns, read_header
+
+try:
+    import pyarrow as pa
+    from pyarrow import parquet
+except ImportError:
+    pa = None
+
+
+CHUNK_SIZE = 250_000
+
+
+def stream_trips(path=DATA_FILE, target=None, chunksize=CHUNK_SIZE):
+    """ Clean path chunk by chunk into the Parquet file target and return target
+
+    target defaults to the csv path with a .parquet extension.
+    """
+    if target is None:
+        target = os.path.splitext(path)[0] + '.parquet'
+    partial = target + '.partial'
+    writer = None
+    # decided once for the file, a chunk can lack member data the file records
+    missing = missing_columns(read_header(path))
+    try:
+        for chunk in iter_trips(path, chunksize):
+            table = pa.Table.from_pandas(clean_trips(chunk, missing), preserve_index = True)
+            if writer is None:
+                writer = parquet.ParquetWriter(partial, table.schema)
+            # nullable columns can come out with another pandas type in some
+            # chunks (e.g. age without missing values), the arrow types match
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError('{} has no trips'.format(path))
+    os.replace(partial, target)
+    return target
+
+
+def read_streamed(target, columns=None):
+    """ Read a file written by stream_trips back into a dataframe """
+    return parquet.read_table(target, columns = columns).to_pandas()
+
+
+def iter_streamed(target, columns=None):
+    """ Iterate over the cleaned chunks of a file written by stream_trips """
+    store = parquet.ParquetFile(target)
+    for group in range(store.num_row_groups):
+        yield store.read_row_group(group, columns = columns).to_pandas()
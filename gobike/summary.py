@@ -0,0 +1,179 @@
+"""describe() views answered from per-partition summaries.
+
+TripSummary keeps, for every partition of the trips (start station and
+start day, and month for an archive), the count, mean, sum of squared
+deviations, minimum and maximum of duration and age, a QuantileSketch of
+both, and the counts of every level of the categorical columns. The
+describe() of any column over any set of partitions (all trips, the top
+10 stations, a month...) is merged from those numbers without reading
+the trip rows again; the quartiles come from the sketches and are within
+their 1% error.
+
+The means and sums of squares are merged with the pairwise formulas of
+Chan et al., so summaries of chunks or monthly files computed separately,
+e.g. in parallel by summarize_archive(), merge into the summary of all
+of them in any order.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from .archive import clean_month, map_months, trip_files
+from .cache import CACHE_DIR
+from .sketches import QuantileSketch, group_codes
+
+PARTITIONS = ['start_station_id', 'start_day', 'month']
+SUMMARY_VARIABLES = ['duration_mins', 'age']
+SUMMARY_CATEGORIES = ['start_day', 'end_day', 'day_period', 'user_type', 'member_gender']
+
+
+class TripSummary:
+    """ Moments, extremes, quantile sketches and level counts of the trip columns per partition """
+
+    def __init__(self, groups, moments, sketches, levels):
+        self.groups = groups
+        self.moments = moments
+        self.sketches = sketches
+        self.levels = levels
+
+    @classmethod
+    def from_trips(cls, trips, partitions=PARTITIONS, variables=SUMMARY_VARIABLES, categories=SUMMARY_CATEGORIES):
+        """ Summarize the trips per partition (the columns of partitions that trips has) """
+        codes, groups = group_codes(trips, [column for column in partitions if column in trips.columns])
+        keep = codes >= 0
+        moments, sketches = {}, {}
+        for variable in variables:
+            values = trips[variable].to_numpy(dtype = np.float64, na_value = np.nan)
+            present = keep & ~np.isnan(values)
+            count = np.bincount(codes[present], minlength = len(groups))
+            total = np.bincount(codes[present], values[present], minlength = len(groups))
+            mean = np.divide(total, count, out = np.full(len(groups), np.nan), where = count > 0)
+            # sum of squared deviations from the mean, the quantity that merges exactly
+            m2 = np.bincount(codes[present], (values[present] - mean[codes[present]]) ** 2, minlength = len(groups))
+            sketches[variable] = QuantileSketch.from_codes(variable, trips[variable], codes, groups)
+            # the sketches keep the exact extremes of the (positive) values
+            moments[variable] = pd.DataFrame({'count': count.astype(np.float64), 'mean': mean, 'm2': m2,
+                                              'min': sketches[variable].minimum, 'max': sketches[variable].maximum})
+        levels = {}
+        for column in categories:
+            if column not in trips.columns:
+                continue
+            if isinstance(trips[column].dtype, pd.CategoricalDtype):
+                level_codes, labels = trips[column].cat.codes.to_numpy(), trips[column].cat.categories
+            else:
+                level_codes, labels = pd.factorize(trips[column], sort = True)
+            present = keep & (level_codes >= 0)
+            cells = np.bincount(codes[present] * len(labels) + level_codes[present], minlength = len(groups) * len(labels))
+            levels[column] = pd.DataFrame(cells.reshape(len(groups), len(labels)), columns = pd.Index(labels))
+        return cls(groups, moments, sketches, levels)
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        """ Summary of an iterable of cleaned trip chunks, e.g. from iter_trips """
+        return merge_summaries(cls.from_trips(chunk, **kwargs) for chunk in chunks)
+
+    def __repr__(self):
+        return 'TripSummary({} partitions by {})'.format(len(self.groups), list(self.groups.names))
+
+    def merge(self, other):
+        """ Summary of the trips of both summaries """
+        if list(other.groups.names) != list(self.groups.names):
+            raise ValueError('cannot merge summaries partitioned by different columns')
+        groups = self.groups.append(other.groups).unique()
+        mine, theirs = groups.get_indexer(self.groups), groups.get_indexer(other.groups)
+        moments = {}
+        for variable in self.moments:
+            left = _align(self.moments[variable], mine, len(groups))
+            right = _align(other.moments[variable], theirs, len(groups))
+            moments[variable] = _merge_moments(left, right)
+        levels = {}
+        for column in self.levels:
+            left = _align(self.levels[column], mine, len(groups)).fillna(0)
+            right = _align(other.levels[column], theirs, len(groups)).fillna(0)
+            levels[column] = left.add(right, fill_value = 0).astype('int64')[_union(left.columns, right.columns)]
+        sketches = {variable: sketch.merge(other.sketches[variable]) for variable, sketch in self.sketches.items()}
+        return TripSummary(groups, moments, sketches, levels)
+
+    def rows(self, **filters):
+        """ Positions of the partitions matching filters (partition column=value or list of values) """
+        keep = np.ones(len(self.groups), dtype = bool)
+        for column, wanted in filters.items():
+            if column not in self.groups.names:
+                raise KeyError('summary is not partitioned by {}'.format(column))
+            wanted = [wanted] if np.ndim(wanted) == 0 else list(wanted)
+            values = self.groups.get_level_values(column)
+            missing = [value for value in wanted if value not in set(values)]
+            if missing:
+                raise KeyError('{} has no {}'.format(column, missing))
+            keep &= values.isin(wanted)
+        return np.flatnonzero(keep)
+
+    def describe(self, column, **filters):
+        """ describe() of a column over the partitions matching filters """
+        rows = self.rows(**filters)
+        if column in self.levels:
+            counts = self.levels[column].iloc[rows].sum()
+            counts = counts[counts > 0]
+            return pd.Series({'count': counts.sum(), 'unique': len(counts),
+                              'top': counts.idxmax() if len(counts) else np.nan,
+                              'freq': counts.max() if len(counts) else np.nan}, name = column, dtype = object)
+        if column not in self.moments:
+            raise KeyError('{} is not summarized'.format(column))
+        total = _total_moments(self.moments[column].iloc[rows])
+        sketch = self.sketches[column]
+        sketch = sketch.collapse(rows = sketch.groups.get_indexer(self.groups[rows]))
+        quartiles = sketch.quantile_values([0.25, 0.5, 0.75])[:, 0]
+        return pd.Series({'count': total['count'], 'mean': total['mean'],
+                          'std': np.sqrt(total['m2'] / (total['count'] - 1)) if total['count'] > 1 else np.nan,
+                          'min': total['min'], '25%': quartiles[0], '50%': quartiles[1], '75%': quartiles[2],
+                          'max': total['max']}, name = column)
+
+
+def _align(frame, positions, length):
+    """ frame with its rows moved to positions in a frame of length rows """
+    aligned = pd.DataFrame(np.nan, index = range(length), columns = frame.columns)
+    aligned.iloc[positions] = frame.to_numpy(dtype = np.float64)
+    return aligned
+
+
+def _union(left, right):
+    return list(left) + [level for level in right if level not in set(left)]
+
+
+def _merge_moments(left, right):
+    """ Moments of the rows of left and right, partition by partition """
+    left, right = left.fillna({'count': 0, 'm2': 0}), right.fillna({'count': 0, 'm2': 0})
+    count = left['count'] + right['count']
+    delta = right['mean'].fillna(0) - left['mean'].fillna(0)
+    share = (right['count'] / count.where(count > 0)).fillna(0)
+    mean = left['mean'].fillna(0) + delta * share
+    m2 = left['m2'] + right['m2'] + delta ** 2 * left['count'] * share
+    return pd.DataFrame({'count': count, 'mean': mean.where(count > 0), 'm2': m2,
+                         'min': np.fmin(left['min'], right['min']), 'max': np.fmax(left['max'], right['max'])})
+
+
+def _total_moments(moments):
+    """ Moments of all the partitions in moments together """
+    moments = moments.fillna({'count': 0, 'm2': 0})
+    count = moments['count'].sum()
+    if not count:
+        return pd.Series({'count': 0, 'mean': np.nan, 'm2': 0, 'min': np.nan, 'max': np.nan})
+    mean = (moments['count'] * moments['mean'].fillna(0)).sum() / count
+    m2 = moments['m2'].sum() + (moments['count'] * (moments['mean'].fillna(mean) - mean) ** 2).sum()
+    return pd.Series({'count': count, 'mean': mean, 'm2': m2, 'min': moments['min'].min(), 'max': moments['max'].max()})
+
+
+def merge_summaries(summaries):
+    """ Merge an iterable of summaries, e.g. one per month """
+    return reduce(TripSummary.merge, summaries)
+
+
+def summarize_month(path, cache_dir=CACHE_DIR):
+    """ TripSummary of one monthly file, partitioned by station, day and month """
+    return TripSummary.from_trips(clean_month(path, cache_dir))
+
+
+def summarize_archive(source, processes=None, cache_dir=CACHE_DIR):
+    """ TripSummary of all monthly files in source, summarized in parallel like load_archive() """
+    return merge_summaries(map_months(summarize_month, trip_files(source), processes, cache_dir))
@@ -0,0 +1,34 @@
+"""log10 transforms of the duration and age columns.
+
+Part1 plots duration and age on log scales. log_trans() works on whole
+columns (and on tick lists or scalars) instead of one value at a time
+through Series.apply, and with_log_columns() adds log_duration and
+log_age to a dataset once, before it is sliced, so that every subset
+(e.g. the top 10 stations) already carries them and nothing is assigned
+to a slice afterwards.
+"""
+import numpy as np
+import pandas as pd
+
+# log column: column it is computed from
+LOG_COLUMNS = {'log_duration': 'duration_mins', 'log_age': 'age'}
+
+
+def log_trans(x, inverse=False):
+    """ Transformation Helper Function """
+    if isinstance(x, pd.Series):
+        values = x.to_numpy(dtype = np.float64, na_value = np.nan)
+        return pd.Series(log_trans(values, inverse), index = x.index, name = x.name)
+    if not inverse:
+        return np.log10(x)
+    else:
+        return np.power(10, x)
+
+
+def with_log_columns(trips):
+    """ trips with the log_duration and log_age columns, computed only if they are missing """
+    missing = {name: log_trans(trips[column]) for name, column in LOG_COLUMNS.items()
+               if name not in trips.columns and column in trips.columns}
+    if not missing:
+        return trips
+    return trips.assign(**missing)